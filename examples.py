@@ -18,28 +18,86 @@ so docstrings are omitted or kept essential below.
 
 def teadir():
     ''' this utility function lists all tea files in the current directory '''
-    import os
     print("{}:".format(os.getcwd()))
     for f in os.listdir('.'):
         if f.endswith(".tea"):
             print (f)
 
 
+import os
 import random
+from contextlib import contextmanager
+from urllib import urlopen
 from teafiles import *
 
+try:
+    import numpy as np
+except ImportError:
+    np = None       # numpy is optional, the *_fast examples fall back to the plain api if it is missing
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None     # numba is optional as well, it compiles the tick generation loops if available
+
+
+@contextmanager
+def _bulkwriter(tf, buffersize=1 << 16):
+    '''
+    Yields a function that writes one item given by its plain field values (times as ticks) to `tf`.
+    Items are packed into a preallocated buffer that is written to the file whenever it is full and on exit,
+    so no bytes object is created per item. `buffersize` is rounded down to whole items, but holds one item at least.
+    '''
+    itemstruct = tf.itemstruct
+    itemsize = tf.itemsize
+    buf = bytearray(max(buffersize // itemsize, 1) * itemsize)
+    mv = memoryview(buf)
+    pack_into = itemstruct.pack_into
+    filewrite = tf.file.write
+    state = [0]    # write offset into buf
+
+    def write(*values):
+        offset = state[0]
+        if offset == len(buf):
+            filewrite(mv)
+            offset = 0
+        pack_into(buf, offset, *values)
+        state[0] = offset + itemsize
+
+    try:
+        yield write
+    finally:
+        filewrite(mv[:state[0]])
+
 
 def createticks(filename, n, contentdescription=None, namevalues=None):
     '''
     Create a TeaFile holding `n` items of random "Ticks" having fields Time, Price and Volume.
     '''
     with TeaFile.create(filename, "Time Price Volume", "qdq", contentdescription, namevalues) as tf:
-        for t in rangen(DateTime(2000, 1, 1), Duration(minutes=1), n):    # increments n times by 1 minute
+        for t in rangen(DateTime(2000, 1, 1), ONE_MINUTE, n):    # increments n times by 1 minute
             r = random.random()
             tf.write(t, r * 100, int(r * 1000))
     print(tf)
 
 
+def createticks_bulk(filename, n, contentdescription=None, namevalues=None):
+    '''
+    Creates the same random ticks as createticks, but computes all items as columns of a numpy array
+    that is written with a single call. Falls back to createticks if numpy is not available.
+    '''
+    if np is None:
+        return createticks(filename, n, contentdescription, namevalues)
+    with TeaFile.create(filename, "Time Price Volume", "qdq", contentdescription, namevalues) as tf:
+        ticks = np.empty(n, dtype=_getnumpydtype(tf))
+        ticks['Time'] = rangenticks(DateTime(2000, 1, 1), ONE_MINUTE, n)
+        r = np.random.random(n)
+        ticks['Price'] = r * 100
+        ticks['Volume'] = (r * 1000).astype(np.int64)
+        tf.writemany(ticks)
+    print(tf)
+
+
 def sumprices(filename):
     '''
     Sums all prices in a teafile holding ticks. This function is used forbenchmarking.
@@ -48,26 +106,162 @@ def sumprices(filename):
         return sum(item.Price for item in tf.items())
 
 
+def _getnumpydtype(tf):
+    ''' returns the structured numpy dtype matching the item layout of `tf` or None if there is none '''
+    try:
+        return tf.description.itemdescription.numpydtype
+    except (TypeError, ValueError):
+        return None
+
+
+def _memmapitems(filename):
+    '''
+    Maps the item area of a teafile into a read only numpy array having a structured dtype that matches the item layout.
+    Returns None if numpy is not available or the item layout cannot be expressed as numpy dtype.
+    '''
+    if np is None:
+        return None
+    with TeaFile.openread(filename) as tf:
+        dt = _getnumpydtype(tf)
+        if dt is None:
+            return None
+        itemareastart = tf.itemareastart
+        n = tf.itemcount
+    if n == 0:
+        return np.zeros(0, dtype=dt)    # an empty region cannot be mapped
+    return np.memmap(filename, dtype=dt, mode='r', offset=itemareastart, shape=(n,))
+
+
+def sumprices_fast(filename):
+    '''
+    Sums all prices like sumprices, but lets numpy sum the Price column of the memory mapped items.
+    Falls back to sumprices if numpy is not available.
+    '''
+    items = _memmapitems(filename)
+    if items is None:
+        return sumprices(filename)
+    return float(items['Price'].sum())
+
+
+def _generatedayticks(begin, end, isgoodday, seed):
+    '''
+    Generates the random ticks of one session between the tick values `begin` and `end` as columns
+    (times, prices, volumes). The random numbers for the whole session are drawn in batches.
+    '''
+    rng = np.random.RandomState(seed)
+    n = (end - begin) // 15000 + 1  # upper bound, ticks are at least 15 seconds apart
+    steps = (15 + rng.randint(0, 21, n)) * 1000
+    times = begin + np.cumsum(steps) - steps
+    times = times[times < end]
+    prices = rng.random_sample(len(times)) * 100
+    if not isgoodday:
+        keep = rng.randint(0, 100, len(times)) < 1
+        times = times[keep]
+        prices = prices[keep]
+    volumes = np.full(len(times), 10, np.int64)
+    return times, prices, volumes
+
+
+def _generatedayticks_loop(begin, end, isgoodday, seed):
+    '''
+    The same as _generatedayticks, written as loop over single random draws such that numba can compile it.
+    '''
+    np.random.seed(seed)
+    n = (end - begin) // 15000 + 1
+    times = np.empty(n, np.int64)
+    prices = np.empty(n, np.float64)
+    count = 0
+    t = begin
+    while t < end:
+        if isgoodday or np.random.randint(0, 100) < 1:
+            times[count] = t
+            prices[count] = np.random.random() * 100
+            count += 1
+        t += (15 + np.random.randint(0, 21)) * 1000
+    volumes = np.full(count, 10, np.int64)
+    return times[:count], prices[:count], volumes
+
+if njit is not None:
+    _generatedayticks = njit(cache=True)(_generatedayticks_loop)
+
+
+_TICKSPERDAY = Duration.DAY   # as module constant, numba cannot read class attributes
+
+
+def _scansessions(times, prices):
+    '''
+    Returns the minimum and maximum of `prices` plus the start and the tick count of each day holding ticks
+    as arrays (minprice, maxprice, daystarts, counts). `times` must be sorted.
+    '''
+    day0 = times[0] - times[0] % _TICKSPERDAY
+    daystarts = np.arange(day0, times[-1] + 1, _TICKSPERDAY)
+    counts = np.diff(np.append(np.searchsorted(times, daystarts), len(times)))
+    return prices.min(), prices.max(), daystarts[counts > 0], counts[counts > 0]
+
+
+def _scansessions_loop(times, prices):
+    '''
+    The same as _scansessions, computing all results in a single pass such that numba can compile it into one loop.
+    '''
+    minprice = maxprice = prices[0]
+    currentday = times[0] // _TICKSPERDAY
+    maxsessions = times[-1] // _TICKSPERDAY - currentday + 1
+    daystarts = np.empty(maxsessions, np.int64)
+    counts = np.zeros(maxsessions, np.int64)
+    daystarts[0] = currentday * _TICKSPERDAY
+    session = 0
+    for i in range(len(times)):
+        day = times[i] // _TICKSPERDAY
+        if day != currentday:
+            currentday = day
+            session += 1
+            daystarts[session] = day * _TICKSPERDAY
+        counts[session] += 1
+        price = prices[i]
+        if price < minprice:
+            minprice = price
+        if price > maxprice:
+            maxprice = price
+    return minprice, maxprice, daystarts[:session + 1], counts[:session + 1]
+
+if njit is not None:
+    _scansessions = njit(cache=True)(_scansessions_loop)
+
+
 def createsessions(filename, numberofsessions):
 
+    sessionbegin = Duration(hours=9)        # sessions begin at 09:00
+    sessionend = Duration(hours=17.5)       # and end at 17:30
+
     def writedailyticks(teafile, day, isgoodday):
         '''
         create a random series of ticks. if isgoodday is false, only 1% as much ticks will be written.
         '''
-        t = day + Duration(hours=9)         # session begins at 09:00
-        end = day + Duration(hours=17.5)    # session ends at 17:30
-        while t < end:
-            if isgoodday or random.randint(0, 99) < 1:
-                price = random.random() * 100
-                tf.write(t, price, 10)
-            t += Duration(seconds=15 + random.randint(0, 20))
+        t = day + sessionbegin
+        end = day + sessionend
+        if np is not None:
+            times, prices, volumes = _generatedayticks(t.ticks, end.ticks, isgoodday, random.randint(0, 2 ** 31 - 1))
+            ticks = np.empty(len(times), dtype=_getnumpydtype(teafile))
+            ticks['Time'] = times
+            ticks['Price'] = prices
+            ticks['Volume'] = volumes
+            teafile.writemany(ticks)
+            return
+        t = t.ticks
+        end = end.ticks
+        with _bulkwriter(teafile) as write:
+            while t < end:
+                if isgoodday or random.randint(0, 99) < 1:
+                    price = random.random() * 100
+                    write(t, price, 10)
+                t += (15 + random.randint(0, 20)) * 1000    # ticks are milliseconds
 
     with TeaFile.create(filename, "Time Price Volume", "qdq") as tf:
         ''' write a file with random tick, similar to ticks as they occur on a stock exchange in reality:
             for <numberofsessions> days we create ticks between 9:00 and 17:30. 10% of the days will
             create only 1% as much ticks than the other days. This simulates bad data
         '''
-        for day in rangen(DateTime(2000, 1, 1), Duration(days=1), numberofsessions):
+        for day in rangen(DateTime(2000, 1, 1), ONE_DAY, numberofsessions):
             isgoodday = random.randint(1, 100) <= 90
             writedailyticks(tf, day, isgoodday)
     print(tf)
@@ -76,57 +270,74 @@ def createsessions(filename, numberofsessions):
 def analyzeticks(filename, displayvalues=True):
     ''' analyze a teafile holding ticks. print elementary descriptive numbers '''
 
-    class _TradingSession:
+    class _TradingSession(object):
+
+        __slots__ = ('begin', 'end', 'tickcount')
 
         def __init__(self, begin):
             self.begin = begin
-            self.end = self.begin + Duration(days=1)
+            self.end = self.begin + ONE_DAY
             self.tickcount = 0
 
         def __repr__(self):
             return " ".join([str(self.begin), str(self.end), str(self.tickcount)])
 
-    with TeaFile.openread(filename) as tf:
-        if tf.itemcount == 0:
-            print("This file holds no items")
-
-        tick = tf.read()
-        session = _TradingSession(tick.Time.date)
-        minprice = maxprice = tick.Price
-        sessions = [session]
-        for tick in tf.items():
-            if tick.Time > session.end:
-                session = _TradingSession(tick.Time.date)
-                sessions.append(session)
-            session.tickcount += 1
-            minprice = min(minprice, tick.Price)
-            maxprice = max(maxprice, tick.Price)
+    ticks = _memmapitems(filename)
+    if ticks is not None and len(ticks):
+        # columnar path: reductions over the Price column, sessions are the days holding ticks
+        minprice, maxprice, daystarts, counts = _scansessions(ticks['Time'], ticks['Price'])
+        mintransactions = counts.min()
+        maxtransactions = counts.max()
+        median = np.sort(counts)[len(counts) // 2]
+        sessions = []
+        for begin, tickcount in zip(daystarts[:15], counts[:15]):
+            session = _TradingSession(DateTime(ticks=int(begin)))
+            session.tickcount = int(tickcount)
+            sessions.append(session)
+    else:
+        with TeaFile.openread(filename) as tf:
+            if tf.itemcount == 0:
+                print("This file holds no items")
+                return
+
+            tick = tf.read()
+            session = _TradingSession(tick.Time.date)
+            sessionend = session.end.ticks  # compare plain ticks, DateTimes are created per session only
+            minprice = maxprice = tick.Price
+            sessions = [session]
+            for tick in tf.items():
+                t = tick.Time.ticks
+                if t > sessionend:
+                    session = _TradingSession(DateTime(ticks=t - t % Duration.DAY))
+                    sessions.append(session)
+                    sessionend = session.end.ticks
+                session.tickcount += 1
+                minprice = min(minprice, tick.Price)
+                maxprice = max(maxprice, tick.Price)
 
         mintransactions = maxtransactions = session.tickcount
         for s in sessions:
             mintransactions = min(mintransactions, s.tickcount)
             maxtransactions = max(maxtransactions, s.tickcount)
 
-        print("min price = {}".format(minprice))
-        print("max price = {}".format(maxprice))
-        print("min ticks per session = {}".format(mintransactions))
-        print("max ticks per session = {}".format(maxtransactions))
-
         tickcounts = sorted([s.tickcount for s in sessions])
         median = tickcounts[len(tickcounts) // 2]
-        print("median = {}".format(median))
 
-        if displayvalues:
-            minimumexpectedtickspersession = median / 2.0
-            print("First 10 sessions:")
-            for s in sessions[:15]:
-                print("{} {}".format(s, "OK" if s.tickcount >= minimumexpectedtickspersession else "QUESTIONABLE"))
+    print("min price = {}".format(minprice))
+    print("max price = {}".format(maxprice))
+    print("min ticks per session = {}".format(mintransactions))
+    print("max ticks per session = {}".format(maxtransactions))
+    print("median = {}".format(median))
+
+    if displayvalues:
+        minimumexpectedtickspersession = median / 2.0
+        print("First 10 sessions:")
+        for s in sessions[:15]:
+            print("{} {}".format(s, "OK" if s.tickcount >= minimumexpectedtickspersession else "QUESTIONABLE"))
 
 
 def gethistoricalprices(symbol, filename, startyear, startmonth, startday, endyear, endmonth, endday):
     ''' fetch historical prices from Yahoo finance and store them in a file '''
-    from urllib import urlopen
-
     url = "http://ichart.yahoo.com/table.csv?s={0}&a={1:02}&b={2:02}&c={3:04}&d={4:02}&e={5:02}&f={6:04}&g=d&ignore=.csv" \
         .format(symbol, startmonth - 1, startday, startyear, endmonth - 1, endday, endyear)
     response = urlopen(url)
@@ -136,28 +347,38 @@ def gethistoricalprices(symbol, filename, startyear, startmonth, startday, endye
     headerline = response.readline().decode("utf8")
     print(headerline)
 
-    # create the file to store the received values
-    tf = TeaFile.create(filename, "Time Open High Low Close AdjClose Volume", "qdddddq", symbol)
-
-    # values arrive in timely reversed order, so we store them in a list and ad them reversed to the file
-    values = []
+    fieldnames = "Time Open High Low Close AdjClose Volume"
+    if np is not None:
+        # parse all lines at once. values arrive in timely reversed order, so we write a reversed view of them
+        csvcolumns = [("Time", "S10"), ("Open", "f8"), ("High", "f8"), ("Low", "f8"), ("Close", "f8"), ("Volume", "i8"), ("AdjClose", "f8")]
+        rows = np.atleast_1d(np.genfromtxt(response, delimiter=",", dtype=csvcolumns))
+        with TeaFile.create(filename, fieldnames, "qdddddq", symbol) as tf:
+            items = np.empty(len(rows), dtype=_getnumpydtype(tf))
+            items["Time"] = rows["Time"].astype("datetime64[ms]").astype(np.int64)
+            for name in tf.description.itemdescription.fieldnames[1:]:
+                items[name] = rows[name]
+            tf.writemany(items[::-1])
+        return
+
+    # values arrive in timely reversed order, so we collect them in columns and add them reversed to the file
+    times, opens, highs, lows, closes, adjcloses, volumes = columns = [], [], [], [], [], [], []
     for line in response:
         line = line.decode("utf8")
         line = line.strip()
         parts = line.split(",")
 
-        t = Time.parse(parts[0], "%Y-%m-%d")
-        open_ = float(parts[1])
-        high = float(parts[2])
-        low = float(parts[3])
-        close = float(parts[4])
-        volume = int(parts[5])
-        adjclose = float(parts[6])
-
-        values.append((t, open_, high, low, close, adjclose, volume))
+        times.append(DateTime.parse(parts[0], "%Y-%m-%d").ticks)
+        opens.append(float(parts[1]))
+        highs.append(float(parts[2]))
+        lows.append(float(parts[3]))
+        closes.append(float(parts[4]))
+        volumes.append(int(parts[5]))
+        adjcloses.append(float(parts[6]))
 
-    for item in reversed(values):
-        tf.write(*item)     # pylint:disable-msg=W0142
+    # create the file to store the received values
+    with TeaFile.create(filename, fieldnames, "qdddddq", symbol) as tf:
+        for item in reversed(zip(*columns)):
+            tf.write(*item)     # pylint:disable-msg=W0142
 
 if __name__ == '__main__':
     # test zone
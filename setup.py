@@ -1,5 +1,11 @@
 from distutils.core import setup
 
+try:
+    from Cython.Build import cythonize
+    ext_modules = cythonize(["teafiles/teafile_fast.pyx"])
+except ImportError:
+    ext_modules = []    # the compiled item reader is optional, teafiles falls back to pure python without it
+
 setup(
     name='teafiles',
     version='0.7.4',
@@ -13,6 +19,7 @@ setup(
     packages=["teafiles"],
     #package_dir={'': 'teafiles'},
     py_modules=['examples'],
+    ext_modules=ext_modules,
     
     keywords='timeseries time series analysis event processing teatime simulation finance',
     license='Creative Commons Attribution-Noncommercial-Share Alike license',
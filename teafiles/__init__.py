@@ -17,6 +17,6 @@ from teafiles.teafile import *
 __all__ = ["TeaFile"]
 
 from teafiles.clockwise import *
-__all__.extend(["DateTime", "Duration", "range", "rangen"])
+__all__.extend(["DateTime", "Duration", "range", "rangen", "rangenticks", "ONE_SECOND", "ONE_MINUTE", "ONE_DAY"])
 
 version = "0.7.4"
@@ -28,9 +28,42 @@ The module name lends from the movie starring John Cleese, pretty pythonesk inde
 import time
 import datetime
 import calendar
+import functools
 
+# Python 3 has a single integer type
+try:
+    long
+except NameError:
+    long = int      # pylint:disable-msg=W0622,C0103
 
-class DateTime:
+try:
+    import numpy
+except ImportError:
+    numpy = None    # numpy is optional, only rangenticks requires it
+
+
+def _memoize(maxsize):
+    '''
+    Decorator caching the results of a function of hashable arguments. This is a stand-in for
+    functools.lru_cache, which Python 2 lacks. The cache is emptied once it holds `maxsize` results.
+    '''
+    def decorator(func):
+        cache = {}
+
+        @functools.wraps(func)
+        def cached(*args):
+            try:
+                return cache[args]
+            except KeyError:
+                if len(cache) >= maxsize:
+                    cache.clear()
+                result = cache[args] = func(*args)
+                return result
+        return cached
+    return decorator
+
+
+class DateTime(object):
     ''' Holds a date and time value measured in milliseconds since the unix
         epoch 1970-01-01. This value, the number of "ticks", is the only state
         maintained by this class.
@@ -54,32 +87,47 @@ class DateTime:
         >>> DateTime(1970, 1, 2).ticks
         86400000
         >>> DateTime(ticks=427).ticks
-        427L
+        427
         >>> DateTime(2000, 1, 1, 77, 88, 99, 5240000).ticks
-        946972619000L
+        946972619000
         >>> DateTime(2000, 1, 1, 77, 88, 99, 5240000, 11).ticks
-        11L
+        11
         '''
 
+    __slots__ = ('_ticks',)
+
     ticksperday = 86400 * 1000  # millseconds per day
 
     def __init__(self, year=1970, month=1, day=1, hours=0, minutes=0, seconds=0, milliseconds=0, ticks=None):
 
         if ticks:
-            self._ticks = long(ticks)
+            self._ticks = ticks if type(ticks) is int else int(ticks)
         else:
             if year > 9999:
                 raise ValueError("Maximum value for year=9999")
             if year < 1:
                 raise ValueError("Minimum value for year=0001")
 
-            dt = DateTime._getticksfromdate(datetime.date(year, month, day)) + \
+            dt = DateTime._getticksfromdate(year, month, day) + \
                 hours * 60 * 60 * 1000 + \
                 minutes * 60 * 1000 + \
                 seconds * 1000 + \
                 milliseconds
             self._ticks = dt
 
+    @classmethod
+    def fromticks(cls, ticks):
+        '''
+        Creates an instance holding `ticks`, skipping the argument handling of the constructor. This is
+        the fast path for code creating many instances from tick values, like `rangen`.
+
+        >>> DateTime.fromticks(86400000)
+        1970-01-02 00:00:00:000
+        '''
+        dt = cls.__new__(cls)
+        dt._ticks = ticks   # pylint:disable-msg=W0212
+        return dt
+
     @staticmethod
     def parse(timestring, format_):
         '''
@@ -106,9 +154,9 @@ class DateTime:
         >>> DateTime().ticks
         0
         >>> DateTime(ticks=300).ticks
-        300L
+        300
         >>> DateTime(2000, 1, 1).ticks
-        946684800000L
+        946684800000
         >>>
         '''
         return self._ticks
@@ -124,7 +172,7 @@ class DateTime:
         2000-03-04 00:00:00:000
         >>>
         '''
-        return DateTime(ticks=self._ticks - self._ticks % DateTime.ticksperday)
+        return DateTime.fromticks(self._ticks - self._ticks % DateTime.ticksperday)
 
     def totimeandms(self):
         '''
@@ -135,9 +183,9 @@ class DateTime:
         This method is used internally but can also serve as an interface to python's standard library time.
 
         >>> DateTime(2011, 4, 5, 22, 00, 14).totimeandms()
-        (time.struct_time(tm_year=2011, tm_mon=4, tm_mday=5, tm_hour=22, tm_min=0, tm_sec=14, tm_wday=1, tm_yday=95, tm_isdst=0), 0L)
+        (time.struct_time(tm_year=2011, tm_mon=4, tm_mday=5, tm_hour=22, tm_min=0, tm_sec=14, tm_wday=1, tm_yday=95, tm_isdst=0), 0)
         >>> DateTime(2011, 4, 5, 22, 00, 14, 333).totimeandms()
-        (time.struct_time(tm_year=2011, tm_mon=4, tm_mday=5, tm_hour=22, tm_min=0, tm_sec=14, tm_wday=1, tm_yday=95, tm_isdst=0), 333L)
+        (time.struct_time(tm_year=2011, tm_mon=4, tm_mday=5, tm_hour=22, tm_min=0, tm_sec=14, tm_wday=1, tm_yday=95, tm_isdst=0), 333)
         >>> DateTime().totimeandms()
         (time.struct_time(tm_year=1970, tm_mon=1, tm_mday=1, tm_hour=0, tm_min=0, tm_sec=0, tm_wday=3, tm_yday=1, tm_isdst=0), 0)
         '''
@@ -145,119 +193,59 @@ class DateTime:
         return time.gmtime(sec), millisec
 
     @staticmethod
-    def _getticksfromdate(date):
-        ''' Gets the ticks from a datetime.date value '''
-        return (date.toordinal() - 719163) * DateTime.ticksperday
+    @_memoize(4096)
+    def _getticksfromdate(year, month, day):
+        ''' Gets the ticks of a date. Cached, since few distinct dates are usually converted many times. '''
+        return (datetime.date(year, month, day).toordinal() - 719163) * DateTime.ticksperday
 
     def __repr__(self):
-        ts, milliseconds = self.totimeandms()
-        return '{:04}-{:02}-{:02} {:02}:{:02}:{:02}:{:03}' \
-            .format(ts[0], ts[1], ts[2], ts[3], ts[4], ts[5], milliseconds)
+        return _formatticks(self._ticks)
 
 # pylint: disable-msg=W0212
 
     # equality
     def __eq__(self, other):
-        '''
-        >>> DateTime() == DateTime()
-        True
-        >>> DateTime(2011, 1, 2, 3, 4, 5) == DateTime(2011, 1, 2, 3, 4, 5)
-        True
-        >>> DateTime(2011, 1, 2, 3, 4, 999) == DateTime(2011, 1, 2, 3, 4, 5)
-        False
-        >>>
-        '''
+        ''' True if both hold the same ticks. An integer is compared against the ticks. '''
         if isinstance(other, DateTime):
             return self._ticks == other._ticks
-        if isinstance(other, long) or isinstance(other, int):
+        if isinstance(other, (int, long)):
             return self._ticks == other
-        raise ValueError('comparison of date with invalid type')
+        return NotImplemented
 
     def __ne__(self, other):
-        '''
-        >>> DateTime() != DateTime()
-        False
-        >>> DateTime(2011, 1, 2, 3, 4, 5) != DateTime(2011, 1, 2, 3, 4, 5)
-        False
-        >>> DateTime(2011, 1, 2, 3, 4, 999) != DateTime(2011, 1, 2, 3, 4, 5)
-        True
-        '''
-        return self._ticks != other._ticks
+        ''' True if the ticks differ. An integer is compared against the ticks. '''
+        if isinstance(other, DateTime):
+            return self._ticks != other._ticks
+        if isinstance(other, (int, long)):
+            return self._ticks != other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._ticks)    # consistent with __eq__, which compares integers against the ticks
 
     # comparison
     def __lt__(self, other):
-        '''
-        >>> DateTime(100) < DateTime(110)
-        True
-        >>> DateTime(100) < DateTime(101)
-        True
-        >>> DateTime(100) < DateTime(100)
-        False
-        >>> DateTime(100) < DateTime(99)
-        False
-        '''
+        ''' Compares the ticks. '''
         return self._ticks < other._ticks
 
     def __le__(self, other):
-        '''
-        >>> DateTime(100) <= DateTime(110)
-        True
-        >>> DateTime(100) <= DateTime(101)
-        True
-        >>> DateTime(100) <= DateTime(100)
-        True
-        >>> DateTime(100) <= DateTime(99)
-        False
-        '''
+        ''' Compares the ticks. '''
         return self._ticks <= other._ticks
 
     def __gt__(self, other):
-        '''
-        >>> DateTime(100) > DateTime(110)
-        False
-        >>> DateTime(100) > DateTime(101)
-        False
-        >>> DateTime(100) > DateTime(100)
-        False
-        >>> DateTime(100) > DateTime(99)
-        True
-        '''
+        ''' Compares the ticks. '''
         return self._ticks > other._ticks
 
     def __ge__(self, other):
-        '''
-        >>> DateTime(100) >= DateTime(110)
-        False
-        >>> DateTime(100) >= DateTime(101)
-        False
-        >>> DateTime(100) >= DateTime(100)
-        True
-        >>> DateTime(100) >= DateTime(99)
-        True
-        '''
+        ''' Compares the ticks. '''
         return self._ticks >= other._ticks
 
     # add
     def __add__(self, rhs):
-        '''
-        >>> DateTime() + Duration()
-        1970-01-01 00:00:00:000
-        >>> DateTime(ticks=10) + Duration()
-        1970-01-01 00:00:00:010
-        >>> DateTime(ticks=10) + Duration(ticks=3)
-        1970-01-01 00:00:00:013
-        >>> DateTime(ticks=10) + Duration(ticks=-17)
-        1969-12-31 23:59:59:993
-        >>> t = DateTime()
-        >>> t
-        1970-01-01 00:00:00:000
-        >>> t += Duration(ticks=77)
-        >>> t
-        1970-01-01 00:00:00:077
-        '''
+        ''' Adds a Duration, returning a new DateTime. '''
         if isinstance(rhs, Duration):
-            return DateTime(ticks=self._ticks + rhs._ticks)
-        raise ValueError('only a Duration can be added to a time')
+            return DateTime.fromticks(self._ticks + rhs._ticks)
+        return NotImplemented   # only a Duration can be added to a time
 
     # integral type
     def __trunc__(self):
@@ -266,8 +254,15 @@ class DateTime:
     def __int__(self):
         return self._ticks
 
+    # pickling, required for all protocols on Python 2 since the class uses __slots__
+    def __getstate__(self):
+        return (self._ticks,)
+
+    def __setstate__(self, state):
+        self._ticks = state[0]
+
 
-class Duration:
+class Duration(object):
     '''
     Stores a duration as number of milliseconds. In combination with `DateTime`
     provides time arithmetic.
@@ -294,6 +289,8 @@ class Duration:
     1 days 00:00:01:050
     '''
 
+    __slots__ = ('_ticks',)
+
     MILLISECOND = 1
     SECOND = 1000 * MILLISECOND
     MINUTE = 60 * SECOND
@@ -310,7 +307,7 @@ class Duration:
             ticks += Duration.DAY * days
             ticks += 7 * Duration.DAY * weeks
 
-        self._ticks = long(ticks)   # ticks shall always be integers
+        self._ticks = ticks if type(ticks) is int else int(ticks)   # ticks shall always be integers
 
     @property
     def ticks(self):
@@ -318,7 +315,7 @@ class Duration:
         Returns the underlying number of ticks, that is the number of milliseconds.
 
         >>> Duration(ticks=1033).ticks
-        1033L
+        1033
         '''
         return self._ticks
 
@@ -342,94 +339,36 @@ class Duration:
 # pylint: disable-msg=W0212
 
     def __add__(self, other):
-        '''
-        Adds another duration or integer (interpreted as milliseconds).
-
-        >>> Duration(days=4) + Duration(hours=7)
-        4 days 07:00:00:000
-
-        >>> Duration(days=4) + 3000
-        4 days 00:00:03:000
-        '''
+        ''' Adds another duration or integer (interpreted as milliseconds). '''
         if isinstance(other, Duration):
             return Duration(ticks=self._ticks + other._ticks)
-        elif isinstance(other, int) or isinstance(other, long):
+        elif isinstance(other, (int, long)):
             return Duration(ticks=self._ticks + other)
         raise ValueError("Invalid operand: Can add only int, long or instances of Duration to Duration")
 
     def __eq__(self, other):
-        '''
-        >>> Duration() == Duration()
-        True
-        >>> Duration() == Duration(ticks=3)
-        False
-        >>> Duration(ticks=3) == Duration(ticks=3)
-        True
-        '''
-        return self._ticks == other.ticks
+        ''' Compares the ticks. '''
+        return self._ticks == other._ticks
 
     def __ne__(self, other):
-        '''
-        >>> Duration() != Duration()
-        False
-        >>> Duration() != Duration(ticks=3)
-        True
-        >>> Duration(ticks=3) != Duration(ticks=3)
-        False
-        '''
-        return self._ticks != other.ticks
+        ''' Compares the ticks. '''
+        return self._ticks != other._ticks
 
     def __gt__(self, other):
-        '''
-        >>> Duration() > Duration()
-        False
-        >>> Duration() > Duration(ticks=3)
-        False
-        >>> Duration(ticks=3) > Duration(ticks=3)
-        False
-        >>> Duration(ticks=400) > Duration(ticks=3)
-        True
-        '''
-        return self._ticks > other.ticks
+        ''' Compares the ticks. '''
+        return self._ticks > other._ticks
 
     def __ge__(self, other):
-        '''
-        >>> Duration() >= Duration()
-        True
-        >>> Duration() >= Duration(ticks=3)
-        False
-        >>> Duration(ticks=3) >= Duration(ticks=3)
-        True
-        >>> Duration(ticks=400) >= Duration(ticks=3)
-        True
-        '''
-        return self._ticks >= other.ticks
+        ''' Compares the ticks. '''
+        return self._ticks >= other._ticks
 
     def __lt__(self, other):
-        '''
-        >>> Duration() < Duration()
-        False
-        >>> Duration() < Duration(ticks=3)
-        True
-        >>> Duration(ticks=3) < Duration(ticks=3)
-        False
-        >>> Duration(ticks=400) < Duration(ticks=3)
-        False
-        '''
-        return self._ticks < other.ticks
+        ''' Compares the ticks. '''
+        return self._ticks < other._ticks
 
     def __le__(self, other):
-        '''
-        >>> Duration() <= Duration()
-        True
-        >>> Duration() <= Duration(ticks=3)
-        True
-        >>> Duration(ticks=3) <= Duration(ticks=3)
-        True
-        >>> Duration(ticks=400) <= Duration(ticks=3)
-        False
-        '''
-        return self._ticks <= other.ticks
+        ''' Compares the ticks. '''
+        return self._ticks <= other._ticks
 
     def __repr__(self):
         '''
@@ -448,10 +387,31 @@ class Duration:
     def __int__(self):
         return self._ticks
 
+    def __getstate__(self):
+        return (self._ticks,)
+
+    def __setstate__(self, state):
+        self._ticks = state[0]
+
 # pylint: enable-msg=W0212
 
 
+# frequently used durations. Duration instances are immutable, so these can be shared
+ONE_SECOND = Duration(seconds=1)
+ONE_MINUTE = Duration(minutes=1)
+ONE_DAY = Duration(days=1)
+
+
 #utils
+@_memoize(4096)
+def _formatticks(ticks):
+    ''' returns the string representation of a DateTime holding `ticks`. printing the same times repeatedly is common, hence cached. '''
+    sec, milliseconds = divmod(ticks, 1000)
+    ts = time.gmtime(sec)
+    return '{:04}-{:02}-{:02} {:02}:{:02}:{:02}:{:03}' \
+        .format(ts[0], ts[1], ts[2], ts[3], ts[4], ts[5], milliseconds)
+
+
 def isdatetime(value):
     '''
     Returns true if `value` is an instance of DateTime.
@@ -504,7 +464,7 @@ def _rangedate(start, stop, step):
     stop = stop.ticks
     step = step.ticks
     while t < stop:
-        yield DateTime(ticks=t)
+        yield DateTime.fromticks(t)
         t += step
 
 
@@ -530,11 +490,27 @@ def rangen(startdate, stepduration, count):
     t = startdate.ticks
     step = stepduration.ticks
     while count:
-        yield DateTime(ticks=t)
+        yield DateTime.fromticks(t)
         t += step
         count -= 1
 
 
+def rangenticks(startdate, stepduration, count):
+    '''
+    The ticks of the DateTime values generated by `rangen`, returned at once as a numpy
+    int64 array. Requires numpy.
+
+    >>> ticks = rangenticks(DateTime(2000, 9, 1), Duration(days=1), 3)
+    >>> print(ticks)
+    [967766400000 967852800000 967939200000]
+    >>> ticks.dtype
+    dtype('int64')
+    '''
+    if numpy is None:
+        raise ImportError("rangenticks requires numpy")
+    return startdate.ticks + numpy.arange(count, dtype=numpy.int64) * stepduration.ticks
+
+
 if __name__ == '__main__':
     import doctest
     import teafiles.clockwise
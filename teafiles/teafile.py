@@ -22,15 +22,50 @@
 # W0122:730,8:TeaFile._attachwritemethod: Use of the exec statement
 # C0301:172,0: Line too long (104/80) - maybe trim docstrings later for terminal users
 
+import io
+import os
+import mmap
+import re
 import struct
 import uuid
 from io import BytesIO
 from collections import namedtuple
-from teafiles.clockwise import DateTime
+from functools import partial
+from itertools import islice
+from pprint import pformat
+from teafiles.clockwise import DateTime, _memoize
+
+try:
+    import numpy
+except ImportError:
+    numpy = None    # numpy is optional, only readarray requires it
+
+try:
+    from teafiles import teafile_fast
+except ImportError:
+    teafile_fast = None     # the compiled item reader is optional, setup.py builds it if Cython is available
 
 # if set to true, time fields are returned as instances of clockwise.DateTime, otherwise
 USE_TIME_DECORATION = True
 
+# size of the buffer used for files opened for writing. items are small, so a large buffer coalesces many item writes into few system calls.
+WRITE_BUFFER_SIZE = 1 << 20
+
+# header values are stored little endian, whatever the byte order of the platform writing them
+_INT32 = struct.Struct("<i")
+_INT64 = struct.Struct("<q")
+_DOUBLE = struct.Struct("<d")
+_HEADERHEAD = struct.Struct("<qqqq")        # byte order mark, item area start and end, section count
+_BOMVALUE = 0x0d0e0a0402080500
+_BOM = _INT64.pack(_BOMVALUE)               # the bytes every teafile starts with
+_SECTIONHEAD = struct.Struct("<ii")         # section id, offset of the next section
+_ITEMSECTIONHEAD = struct.Struct("<ii")     # itemsize, length of the item name
+_FIELDHEAD = struct.Struct("<iii")          # fieldtype, offset, length of the field name
+_TIMESECTIONHEAD = struct.Struct("<qqi")    # epoch, ticks per day, number of time fields
+
+# number of bytes items() reads at once. the chunk is rounded down to a multiple of the item size.
+READ_CHUNK_SIZE = 1 << 16
+
 
 class TeaFile:
     '''
@@ -79,6 +114,9 @@ class TeaFile:
 
         self._filename = filename   # we need the filename for the call to getsize in itemareaend()
         self.file = None
+        self._mm = None     # files opened for read only are mapped into memory
+        self._pos = None    # and read at this position instead of the file pointer
+        self._mmviews = False   # set once arrays viewing the mapping were returned, these keep it open
 
         self._description = None
 
@@ -88,11 +126,19 @@ class TeaFile:
 
         self.itemstruct = None
         self.nameditemtuple = None
+        self._itembuf = None    # read() reads each item into this buffer
+        self._itemsize = None   # itemsize, struct and file methods bound once for read()
+        self._unpack_from = None
+        self._readinto = None
+        self._timeindexes = None
+        self._make = None       # creates an item from its values
+        self._itemreader = None     # compiled reader, if teafile_fast is available
+        self._arraydtype = None
 
         self.write = None
 
     @staticmethod
-    def create(filename, fieldnames, fieldformat=None, contentdescription=None, namevalues=None):
+    def create(filename, fieldnames, fieldformat=None, contentdescription=None, namevalues=None, packforsize=False):
         '''
         creates a new file and writes its header based on the description passed.
         leaves the file open, such that items can be added immediately. the caller must close the
@@ -116,6 +162,9 @@ class TeaFile:
               numbers of decimals to be used to format floating point values. This api for instance makes
               use of this convention. Besides formatting, an application might also treat this number
               as the accuracy of floating point values.
+            * **packforsize**: If true, fields are reordered by descending size, such that no padding bytes are
+              needed between them. Items get smaller, but their fields, the arguments of write and the named
+              tuples read follow this order, not the order of `fieldnames`. See `ItemDescription.create`.
 
         >>> from teafiles import *
         >>> tf = TeaFile.create("lab.tea", "Time Temperature Humidity", "qdd") # create a file with 3 fields of types int64, double, double
@@ -123,7 +172,7 @@ class TeaFile:
         >>> tf.write(DateTime(2011, 3, 2), 45.1, 31.8)
         >>> tf.close()
         >>> tf.itemcount
-        2L
+        2
 
         note that itemcount is still accessible, even after the file is closed.
         '''
@@ -131,7 +180,7 @@ class TeaFile:
 
         # setup description
         tf._description = d = TeaFileDescription()
-        id_ = ItemDescription.create(None, fieldnames, fieldformat)
+        id_ = ItemDescription.create(None, fieldnames, fieldformat, packforsize)
         tf.itemstruct = id_.itemstruct
         d.itemdescription = id_
         d.contentdescription = contentdescription
@@ -140,7 +189,7 @@ class TeaFile:
 
         # open file and write header
 
-        tf.file = open(filename, "wb")
+        tf.file = io.open(filename, "wb", buffering=WRITE_BUFFER_SIZE)
         hm = _HeaderManager()
         fio = _FileIO(tf.file)
         fw = _FormattedWriter(fio)
@@ -148,6 +197,7 @@ class TeaFile:
         tf.itemareastart = wc.itemareastart
         tf._itemareaend = wc.itemareaend
         tf.itemsize = id_.itemsize
+        tf._bindfields()
 
         tf._attachwritemethod()     # pylint:disable-msg=W0212
 
@@ -210,19 +260,27 @@ class TeaFile:
     def _open(filename, mode):
         ''' internal open method, used by openread and openwrite '''
         tf = TeaFile(filename)
-        tf.file = open(filename, mode)
-        fio = _FileIO(tf.file)
+        if "+" in mode:
+            tf.file = io.open(filename, mode, buffering=WRITE_BUFFER_SIZE)
+        else:
+            tf.file = io.open(filename, mode)
+        fio = _BufferedFileIO(tf.file)
         fr = _FormattedReader(fio)
         hm = _HeaderManager()
         rc = hm.readheader(fr)
+        tf.file.seek(fio.position())    # the header was read ahead, the file pointer goes back to the item area
         tf._description = rc.description
         id_ = tf._description.itemdescription
         if id_:
             tf.itemsize = id_.itemsize
             tf.itemstruct = id_.itemstruct
             tf.nameditemtuple = id_.itemtype
+            tf._bindfields()
         tf.itemareastart = rc.itemareastart
         tf._itemareaend = rc.itemareaend
+        if mode == "rb":
+            tf._mm = mmap.mmap(tf.file.fileno(), 0, access=mmap.ACCESS_READ)
+            tf._pos = tf.itemareastart
 
         nvs = tf._description.namevalues
         if nvs and nvs.get("decimals"):
@@ -232,9 +290,10 @@ class TeaFile:
 #pylint:enable-msg=W0212
 
     # read & write
-    def read(self):
+    def read(self, raw=False):
         '''
         Read then next item at the position of the file pointer. If no more items exist, None is returned.
+        If `raw` is true, the item is returned as plain tuple of the values stored, time fields hold their ticks.
 
         >>> with TeaFile.create('lab.tea', 'A B') as tf:
         ...     for i in range(3):
@@ -248,15 +307,37 @@ class TeaFile:
         >>> tf.read()
         AB(A=2, B=20)
         >>> tf.read()
-        >>>
+        >>> tf.seekitem(1)
+        >>> tf.read(raw=True)
+        (1, 10)
         '''
-        itembytes = self.file.read(self.itemsize)
-        if not itembytes:
-            return None
-        itemvalues = self.itemstruct.unpack(itembytes)
-        adjusteditemvalues = [f.getvalue(itemvalues) for f in self._description.itemdescription.fields]
-        tupelized = tuple(adjusteditemvalues)
-        return self.nameditemtuple(*tupelized)
+        itemsize = self._itemsize
+        unpack_from = self._unpack_from
+        mm = self._mm
+        if mm is not None:
+            pos = self._pos
+            if pos + itemsize > len(mm):
+                return None
+            self._pos = pos + itemsize
+            if raw:
+                return unpack_from(mm, pos)
+            if self._itemreader is not None:
+                return self._itemreader.readat(mm, pos)
+            itemvalues = unpack_from(mm, pos)
+        else:
+            itembuf = self._itembuf
+            if self._readinto(itembuf) < itemsize:
+                return None
+            if raw:
+                return unpack_from(itembuf)
+            if self._itemreader is not None:
+                return self._itemreader.readat(itembuf, 0)
+            itemvalues = unpack_from(itembuf)
+        if self._timeindexes:
+            itemvalues = list(itemvalues)
+            for i in self._timeindexes:
+                itemvalues[i] = DateTime.fromticks(itemvalues[i])
+        return self._make(itemvalues)
 
     def _write(self, *itemvalues):
         '''
@@ -274,10 +355,42 @@ class TeaFile:
         only in interactive shells, not in py-script editors, since they do not instantiate the class.
         '''
         if USE_TIME_DECORATION:
-            itemvalues = tuple([f.decoratetime(itemvalues) for f in self.description.itemdescription.fields])
+            # DateTime values are stored as their ticks, whatever field they are passed for
+            itemvalues = [v._ticks if isinstance(v, DateTime) else v for v in itemvalues]
         bytes_ = self.itemstruct.pack(*itemvalues)
         self.file.write(bytes_)
 
+    def writemany(self, items):
+        '''
+        Writes many items at once. `items` is a sequence of tuples holding a value for each field, or a numpy array
+        having the dtype `ItemDescription.numpydtype`, the dtype returned by readarray. All items are packed into
+        one buffer that is written with a single call. Arrays are written as they are, time fields hold ticks there.
+
+        >>> with TeaFile.create('lab.tea', 'A B') as tf:
+        ...     tf.writemany([(i, 10*i) for i in range(3)])
+        ...
+        >>> TeaFile.printitems("lab.tea")
+        [AB(A=0, B=0), AB(A=1, B=10), AB(A=2, B=20)]
+        '''
+        if numpy is not None and isinstance(items, numpy.ndarray):
+            if items.dtype != self._description.itemdescription.numpydtype and items.dtype != self._getarraydtype():
+                raise ValueError("dtype of items does not match the item layout: {}".format(items.dtype))
+            self.file.write(items.tobytes())
+            return
+        if not hasattr(items, "__len__"):
+            items = list(items)
+        itemsize = self.itemsize
+        buf = bytearray(len(items) * itemsize)
+        pack_into = self.itemstruct.pack_into
+        decorate = USE_TIME_DECORATION
+        offset = 0
+        for itemvalues in items:
+            if decorate:
+                itemvalues = [v._ticks if isinstance(v, DateTime) else v for v in itemvalues]
+            pack_into(buf, offset, *itemvalues)
+            offset += itemsize
+        self.file.write(buf)
+
     def flush(self):
         '''
         Flush buffered bytes to disk.
@@ -292,13 +405,13 @@ class TeaFile:
         ...
         >>> tf = TeaFile.openwrite('lab.tea')
         >>> tf.itemcount
-        3L
+        3
         >>> tf.write(71)
         >>> tf.itemcount
-        3L
+        3
         >>> tf.flush()
         >>> tf.itemcount
-        4L
+        4
         >>> tf.close()
         '''
         self.file.flush()
@@ -326,7 +439,11 @@ class TeaFile:
         A(A=2)
         >>> tf.close()
         '''
-        self.file.seek(self.itemareastart + itemindex * self.itemsize)
+        position = self.itemareastart + itemindex * self.itemsize
+        if self._mm is not None:
+            self._pos = position
+        else:
+            self.file.seek(position)
 
     def seekend(self):
         '''
@@ -344,12 +461,16 @@ class TeaFile:
         >>> # nothing returned, we are at the end of file
         >>> tf.close()
         '''
-        self.file.seek(0, 2)    # SEEK_END
+        if self._mm is not None:
+            self._pos = len(self._mm)
+        else:
+            self.file.seek(0, 2)    # SEEK_END
 
-    def items(self, start=0, end=None):
+    def items(self, start=0, end=None, raw=False):
         '''
         Returns an iterator over the items in the file allowing start and end to be passed as item index.
-        Calling this method will modify the filepointer.
+        Calling this method will modify the filepointer. If `raw` is true, items are plain tuples of the
+        values stored, like read(raw=True) returns them. This saves creating the named tuples and time values.
 
         Optional, the range of the iterator can be returned
 
@@ -366,26 +487,204 @@ class TeaFile:
         [A(A=2), A(A=3)]
         >>> list(tf.items(1, 5))
         [A(A=1), A(A=2), A(A=3), A(A=4)]
+        >>> list(tf.items(1, 5, raw=True))
+        [(1,), (2,), (3,), (4,)]
         >>>
+
+        Files opened for read only are mapped into memory and items are unpacked right from the mapping. Otherwise
+        items are read in chunks of READ_CHUNK_SIZE bytes. In both cases the file pointer runs ahead of the item
+        last returned while iterating.
         '''
         self.seekitem(start)
         if not end:
             end = self.itemcount
-        current = start
-        while current < end:
-            yield self.read()
-            current += 1
+        itemsize = self.itemsize
+        if raw:
+            unpackitems = self._unpackraw
+        elif self._itemreader is not None:
+            unpackitems = self._itemreader.items
+        else:
+            unpackitems = self._unpackitems
+        if self._mm is not None:
+            begin = self._pos
+            stop = min(self.itemareastart + end * itemsize, len(self._mm))
+            self._pos = max(begin, stop)
+            for item in unpackitems(self._mm, begin, stop):
+                yield item
+            return
+        chunksize = max(1, READ_CHUNK_SIZE // itemsize) * itemsize
+        remaining = (end - start) * itemsize
+        while remaining > 0:
+            buf = self.file.read(min(remaining, chunksize))
+            n = len(buf) - len(buf) % itemsize
+            if n == 0:
+                return  # end of file reached before `end`
+            for item in unpackitems(buf, 0, n):
+                yield item
+            remaining -= n
+
+    def _unpackitems(self, buf, begin, end):
+        ''' yields the items stored in `buf` between the byte offsets `begin` and `end` '''
+        make = self._make
+        maketime = DateTime.fromticks
+        timeindexes = self._timeindexes
+        for batch in self._unpackbatches(buf, begin, end):
+            if not timeindexes:
+                for item in map(make, batch):
+                    yield item
+                continue
+            for itemvalues in batch:
+                itemvalues = list(itemvalues)
+                for i in timeindexes:
+                    itemvalues[i] = maketime(itemvalues[i])
+                yield make(itemvalues)
+
+    def _unpackraw(self, buf, begin, end):
+        ''' yields the values of the items stored in `buf` between the byte offsets `begin` and `end` as tuples '''
+        for batch in self._unpackbatches(buf, begin, end):
+            for itemvalues in batch:
+                yield itemvalues
+
+    def _unpackbatches(self, buf, begin, end):
+        '''
+        yields lists holding the value tuples of the items stored in `buf` between the byte offsets `begin` and
+        `end`. a batch of up to READ_CHUNK_SIZE bytes is unpacked by a single call of a struct that repeats the
+        item layout, so the struct module loops over the items in C. zip then cuts the values into items.
+        '''
+        itemsize = self.itemsize
+        count = max(1, READ_CHUNK_SIZE // itemsize)
+        batchstruct = _getbatchstruct(self.itemstruct.format, count)
+        fieldcount = len(self._description.itemdescription.fields)
+        offset = begin
+        while offset + itemsize <= end:
+            if offset + batchstruct.size > end:
+                count = (end - offset) // itemsize
+                batchstruct = _makebatchstruct(self.itemstruct.format, count)   # the last batch, not cached
+            values = iter(batchstruct.unpack_from(buf, offset))
+            yield zip(*[values] * fieldcount)
+            offset += batchstruct.size
+
+    def readarray(self, start=0, end=None, copy=True):
+        '''
+        Returns the items from index `start` up to `end` as numpy array having a structured dtype that matches
+        the item layout, see `ItemDescription.numpydtype`. The items are read with a single call and no
+        Python object is created per item. Calling this method will modify the filepointer. Requires numpy.
+
+        For files opened with openread and `copy` set to False, the array is a read only view into the mapped
+        file, like the arrays returned by column, so no byte is copied. Such a view keeps the file mapped after
+        closing it, until the view is released. Otherwise the array holds its own copy.
+
+        If the ticks of the time scale can be reinterpreted as numpy datetime64 values without conversion, as is the
+        case for the Java scale, int64 time fields hold datetime64 values. Otherwise they hold their ticks, which
+        `TimeScale.todatetime64` converts.
+
+        >>> with TeaFile.create('lab.tea', 'A B') as tf:
+        ...     for i in range(5):
+        ...         tf.write(i, 10*i)
+        ...
+        >>> with TeaFile.openread('lab.tea') as tf:
+        ...     a = tf.readarray(1, 4)
+        ...
+        >>> a['B'].tolist()
+        [10, 20, 30]
+        >>> a.tolist()
+        [(1, 10), (2, 20), (3, 30)]
+        '''
+        if numpy is None:
+            raise ImportError("readarray requires numpy")
+        self.seekitem(start)
+        if not end:
+            end = self.itemcount
+        n = max(0, min(end, self.itemcount) - start)
+        dtype = self._getarraydtype()
+        if self._mm is not None:
+            pos = self._pos
+            n = max(0, min(n, (len(self._mm) - pos) // self.itemsize))
+            if n == 0:
+                return numpy.zeros(0, dtype)   # frombuffer rejects offsets beyond the mapping
+            self._pos = pos + n * self.itemsize
+            a = numpy.frombuffer(self._mm, dtype, n, pos)
+            if copy:
+                return a.copy()     # the mapping is read only, a copy is not
+            self._mmviews = True
+            return a
+        buf = bytearray(n * self.itemsize)     # a mutable buffer, such that the array returned is writable
+        n = self.file.readinto(buf) // self.itemsize
+        return numpy.frombuffer(buf, dtype, n)
+
+    def column(self, fieldname, start=0, end=None):
+        '''
+        Returns the values of the field `fieldname` of the items from index `start` up to `end` as numpy array.
+        For files opened with openread, the array is a read only view into the mapped file, so no value is copied
+        and the array remains valid after the file is closed, keeping the file mapped until it is released.
+        Otherwise the items are read by readarray, which modifies the filepointer. Time fields hold the same values
+        as returned by readarray. Requires numpy.
+
+        >>> with TeaFile.create('lab.tea', 'A B') as tf:
+        ...     for i in range(5):
+        ...         tf.write(i, 10*i)
+        ...
+        >>> with TeaFile.openread('lab.tea') as tf:
+        ...     b = tf.column('B', 2)
+        ...
+        >>> b.tolist()
+        [20, 30, 40]
+        '''
+        if self._mm is None:
+            return self.readarray(start, end)[fieldname]
+        if numpy is None:
+            raise ImportError("column requires numpy")
+        dtype = self._getarraydtype()
+        if not end:
+            end = self.itemcount
+        n = min(end, (len(self._mm) - self.itemareastart) // self.itemsize) - start
+        if n <= 0:
+            return numpy.zeros(0, dtype)[fieldname]
+        self._mmviews = True
+        return numpy.frombuffer(self._mm, dtype, n, self.itemareastart + start * self.itemsize)[fieldname]
+
+    def topandas(self, start=0, end=None):
+        '''
+        Returns the items from index `start` up to `end` as pandas DataFrame having a column per field. The items are
+        read at once by readarray, so int64 time fields of the Java scale become datetime columns. This is the
+        recommended way to load a file for analysis, read and items remain for incremental processing.
+        Calling this method will modify the filepointer. Requires numpy and pandas.
+        '''
+        try:
+            import pandas   # imported on demand, importing pandas is slow and only this method needs it
+        except ImportError:
+            raise ImportError("topandas requires pandas")
+        return pandas.DataFrame.from_records(self.readarray(start, end))
+
+    def _getarraydtype(self):
+        ''' the dtype of arrays returned by readarray: the numpydtype of the items with int64 time fields as datetime64, if the time scale allows it '''
+        if self._arraydtype is None:
+            id_ = self._description.itemdescription
+            ts = self._description.timescale
+            timeformat = ts.datetime64format if ts else None
+            dtype = id_.numpydtype
+            if timeformat and self._timeindexes:
+                dtype = numpy.dtype({
+                    'names': id_.fieldnames,
+                    'formats': [timeformat if f.istime and f.fieldtype == FieldType.Int64 else FieldType.getnumpyformat(f.fieldtype) for f in id_.fields],
+                    'offsets': [f.offset for f in id_.fields],
+                    'itemsize': id_.itemsize})
+            self._arraydtype = dtype
+        return self._arraydtype
 
     @property
     def itemcount(self):
-        ''' The number of items in the file. '''
-        return self._getitemareasize() / self.itemsize
+        ''' The number of items in the file. For files opened with openread, these are the items mapped at open time. '''
+        return self._getitemareasize() // self.itemsize
 
     def _getitemareaend(self):
         ''' the end of the item area, as an integer '''
-        import os
         if self._itemareaend:
             return self._itemareaend
+        if self._mm is not None:
+            return len(self._mm)    # read only files are mapped completely when opened
+        if self.file is not None and not self.file.closed:
+            return os.fstat(self.file.fileno()).st_size
         return os.path.getsize(self._filename)
 
     def _getitemareasize(self):
@@ -399,6 +698,9 @@ class TeaFile:
         TeaFile implements the context manager protocol and using this protocol is prefered, so manually closing the file
         should be required primarily in interactive mode.
         '''
+        if self._mm is not None and not self._mmviews:
+            self._mm.close()    # otherwise arrays still refer to the mapping, it is released with the last of them
+        self._mm = None
         self.file.close()
 
     # context manager protocol
@@ -477,17 +779,39 @@ class TeaFile:
         return value
 
     #internals
+    def _bindfields(self):
+        ''' binds the buffer and per field methods used for reading and writing items, once the item description is known '''
+        fields = self._description.itemdescription.fields
+        self._itembuf = bytearray(self.itemsize)
+        self._itemsize = self.itemsize
+        self._unpack_from = self.itemstruct.unpack_from
+        self._readinto = self.file.readinto
+        self._timeindexes = [f.index for f in fields if f.istime]
+        if self.nameditemtuple is not None:
+            # like the named tuple's _make, without checking the number of values, which the item struct ensures
+            self._make = partial(tuple.__new__, self.nameditemtuple)
+            if teafile_fast is not None:
+                self._itemreader = teafile_fast.ItemReader(self.itemstruct, self._make, self._timeindexes, DateTime.fromticks)
+
     def _attachwritemethod(self):
-        ''' generate specific write method with named arguments '''
+        '''
+        generate specific write method with named arguments. the method packs and writes the item itself, rather
+        than forwarding to _write, so writing an item costs a single call. names passed into the generated code
+        start with an underscore, which field names cannot.
+        '''
         id_ = self._description.itemdescription
         commafields = ",".join(id_.fieldnames)
-        methodcode = "def customWrite(self, " + commafields + "): self._write(" + commafields + ")"
-        import types
+        decorated = ",".join("{0}._ticks if _isinstance({0}, _DateTime) else {0}".format(name) for name in id_.fieldnames)
+        methodcode = "def makewrite(_pack, _filewrite, _isinstance, _DateTime):\n" \
+                     "    def write(" + commafields + "):\n" \
+                     "        if USE_TIME_DECORATION:\n" \
+                     "            _filewrite(_pack(" + decorated + "))\n" \
+                     "        else:\n" \
+                     "            _filewrite(_pack(" + commafields + "))\n" \
+                     "    return write\n"
         d = {}
-        exec(methodcode, d)
-        func = d["customWrite"]
-        boundmethod = types.MethodType(func, self)
-        self.write = boundmethod
+        exec(methodcode, globals(), d)  # module globals, such that USE_TIME_DECORATION is read when writing
+        self.write = d["makewrite"](self.itemstruct.pack, self.file.write, isinstance, DateTime)
 
     @staticmethod
     def printitems(filename, maxnumberofitems=10):
@@ -509,7 +833,6 @@ class TeaFile:
         >>>
         '''
         with TeaFile.openread(filename) as tf:
-            from itertools import islice
             print(list(islice(tf.items(), maxnumberofitems)))
             if tf.itemcount > maxnumberofitems:
                 print ("{} of {} items".format(maxnumberofitems, tf.itemcount))
@@ -563,19 +886,42 @@ class _ValueKind:   # pylint: disable-msg=R0903
     Invalid, Int32, Double, Text, Uuid = [0, 1, 2, 3, 4]
 
 
+# the `_ValueKind` by the exact type of a value. subclasses are resolved by `_getnamevaluekind`
+_valuekinds = {int: _ValueKind.Int32, float: _ValueKind.Double, str: _ValueKind.Text, unicode: _ValueKind.Text, uuid.UUID: _ValueKind.Uuid}
+
+
 def _getnamevaluekind(value):
     ''' returns the `_ValueKind' based on the for the passed `value` '''
+    kind = _valuekinds.get(type(value))
+    if kind is not None:
+        return kind
     if isinstance(value, int):
         return _ValueKind.Int32
     if isinstance(value, float):
         return _ValueKind.Double
     if isinstance(value, basestring):
         return _ValueKind.Text
-    if isinstance(value, uuid):
+    if isinstance(value, uuid.UUID):
         return _ValueKind.Uuid
     raise ValueError("Invalid type inside NameValue")
 
 
+def _packtext(text):
+    ''' returns `text` in UTF8 encoding, prefixed with its length, the bytes `_FormattedWriter.writetext` writes '''
+    bytes_ = text.encode("utf8")
+    return _INT32.pack(len(bytes_)) + bytes_
+
+
+# returns the bytes of a name-value pair's value, by `_ValueKind`, the counterpart of `_FormattedReader._valuereaders`
+_valuepackers = {_ValueKind.Int32: _INT32.pack, _ValueKind.Double: _DOUBLE.pack, _ValueKind.Text: _packtext, _ValueKind.Uuid: lambda value: value.bytes}
+
+
+def _packnamevalue(name, value):
+    ''' returns the bytes of a name-value pair: the name, the `_ValueKind` of the value and the value '''
+    kind = _getnamevaluekind(value)
+    return _packtext(name) + _INT32.pack(kind) + _valuepackers[kind](value)
+
+
 class TimeScale:
     '''
     The TeaFile format is time format agnostic. Times in such file can be integral or float values
@@ -587,6 +933,9 @@ class TimeScale:
     between applications and operating systems. In this spirit, the clockwise module in this package uses this
     1970 / millisecond time scale.
     '''
+    # the units of numpy.datetime64 by the ticks per day they correspond to
+    _datetime64units = {86400: 's', 86400000: 'ms', 86400000000: 'us', 86400000000000: 'ns'}
+
     def __init__(self, epoch, ticksperday):
         self._epoch = epoch
         self._ticksperday = ticksperday
@@ -611,6 +960,39 @@ class TimeScale:
             return "Net"
         return None
 
+    @property
+    def datetime64format(self):
+        ''' Returns the numpy datetime64 type string, like '<M8[ms]' for the Java scale, that int64 ticks of this scale can be reinterpreted as
+            without any conversion. Returns None if the epoch is not 1970-01-01 or the tick size is no datetime64 unit.
+        '''
+        unit = TimeScale._datetime64units.get(self._ticksperday)
+        if self._epoch != 719162 or unit is None:
+            return None
+        return "<M8[" + unit + "]"
+
+    def todatetime64(self, ticks):
+        '''
+        Converts `ticks` of this time scale, a numpy array or a sequence of integers, into a numpy datetime64 array.
+        int64 arrays of the Java scale are reinterpreted without copying them. Requires numpy.
+
+        >>> print(TimeScale.java().todatetime64([0, 86400000]))
+        ['1970-01-01T00:00:00.000' '1970-01-02T00:00:00.000']
+        >>> TimeScale(0, 864000000000).todatetime64([634348260000000000])  # .Net ticks count 100 ns since 0001-01-01
+        array(['2011-03-04T09:00:00.000000000'], dtype='datetime64[ns]')
+        '''
+        if numpy is None:
+            raise ImportError("todatetime64 requires numpy")
+        ticks = numpy.asarray(ticks, numpy.int64)
+        if self._epoch != 719162:
+            ticks = ticks - (719162 - self._epoch) * self._ticksperday     # ticks since 1970-01-01
+        unit = TimeScale._datetime64units.get(self._ticksperday)
+        if unit is None:
+            if 86400000000000 % self._ticksperday:
+                raise ValueError("ticks of this time scale are no whole number of nanoseconds")
+            ticks = ticks * (86400000000000 // self._ticksperday)
+            unit = "ns"
+        return ticks.view("<M8[" + unit + "]")
+
     def __repr__(self):
         s = "Epoch:         {:>8}\nTicks per Day: {:>8}\n" \
                 .format(self._epoch, self._ticksperday)
@@ -625,25 +1007,27 @@ class _FileIO:
 
     def __init__(self, iofile):
         self.file = iofile
+        self._buf4 = bytearray(4)   # values are read into these buffers, no bytes object is created per value
+        self._buf8 = bytearray(8)
 
     # read
+    def _readinto(self, buf):
+        ''' fill `buf` from the file '''
+        if self.file.readinto(buf) != len(buf):
+            raise EOFError("unexpected end of file")
+        return buf
+
     def readint32(self):
         ''' read a 32bit signed integer from the file '''
-        bytes_ = self.file.read(4)
-        value = struct.unpack("i", bytes_)[0]
-        return value
+        return _INT32.unpack_from(self._readinto(self._buf4))[0]
 
     def readint64(self):
         ''' read a 64bit signed integer from the file '''
-        bytes_ = self.file.read(8)
-        value = struct.unpack("q", bytes_)[0]
-        return value
+        return _INT64.unpack_from(self._readinto(self._buf8))[0]
 
     def readdouble(self):
         ''' read a double from the file '''
-        bytes_ = self.file.read(8)
-        value = struct.unpack("d", bytes_)[0]
-        return value
+        return _DOUBLE.unpack_from(self._readinto(self._buf8))[0]
 
     def readbytes(self, n):
         ''' read `n` bytes from the file '''
@@ -652,21 +1036,15 @@ class _FileIO:
     # write
     def writeint32(self, value):
         ''' write a 32bit signed integer to the file '''
-        bytes_ = struct.pack("i", value)
-        assert len(bytes_) == 4
-        self.file.write(bytes_)
+        self.file.write(_INT32.pack(value))
 
     def writeint64(self, value):
         ''' write a 64bit signed integer to the file '''
-        bytes_ = struct.pack("q", value)
-        assert len(bytes_) == 8
-        self.file.write(bytes_)
+        self.file.write(_INT64.pack(value))
 
     def writedouble(self, value):
         ''' write a double to the file '''
-        bytes_ = struct.pack("d", value)
-        assert len(bytes_) == 8
-        self.file.write(bytes_)
+        self.file.write(_DOUBLE.pack(value))
 
     def writebytes(self, bytes_):
         ''' write the list of byte to the file '''
@@ -675,13 +1053,73 @@ class _FileIO:
     # position
     def skipbytes(self, bytestoskip):
         ''' skip `bytestoskip` in the file. increments the file pointer '''
-        self.file.read(bytestoskip)
+        self.file.seek(bytestoskip, 1)  # SEEK_CUR, the skipped bytes are not read
 
     def position(self):
         ''' returns the file pointer '''
         return self.file.tell()
 
 
+class _BufferedFileIO(_FileIO):
+    '''
+    Reads int32, int64, double and byte lists like `_FileIO`, but from blocks read ahead from the file, so reading
+    a header takes a single read call instead of one per value. The file pointer runs ahead of `position`.
+    '''
+
+    blocksize = 4096
+
+    def __init__(self, iofile):
+        _FileIO.__init__(self, iofile)
+        self._start = iofile.tell()     # the file position of the first byte in _buf
+        self._buf = b""
+        self._pos = 0                   # the read position inside _buf
+
+    def _advance(self, n):
+        ''' ensures `n` bytes are buffered at the read position, returns this position and moves it past these bytes '''
+        if self._pos + n > len(self._buf):
+            rest = self._buf[self._pos:]
+            if self._pos > len(self._buf):
+                self.file.seek(self._start + self._pos)     # bytes were skipped beyond the buffer
+            self._start += self._pos
+            self._buf = rest + self.file.read(max(n - len(rest), self.blocksize))
+            self._pos = 0
+            if n > len(self._buf):
+                raise EOFError("unexpected end of file")
+        pos = self._pos
+        self._pos = pos + n
+        return pos
+
+    # read
+    def readint32(self):
+        ''' read a 32bit signed integer from the buffer '''
+        pos = self._advance(4)    # may refill _buf
+        return _INT32.unpack_from(self._buf, pos)[0]
+
+    def readint64(self):
+        ''' read a 64bit signed integer from the buffer '''
+        pos = self._advance(8)    # may refill _buf
+        return _INT64.unpack_from(self._buf, pos)[0]
+
+    def readdouble(self):
+        ''' read a double from the buffer '''
+        pos = self._advance(8)    # may refill _buf
+        return _DOUBLE.unpack_from(self._buf, pos)[0]
+
+    def readbytes(self, n):
+        ''' read `n` bytes from the buffer '''
+        pos = self._advance(n)
+        return self._buf[pos:pos + n]
+
+    # position
+    def skipbytes(self, bytestoskip):
+        ''' skip `bytestoskip`. bytes beyond the buffer are not read '''
+        self._pos += bytestoskip
+
+    def position(self):
+        ''' returns the read position '''
+        return self._start + self._pos
+
+
 class _FormattedReader:
     ''' Provides formatted reading of a `_FileIO` instance.'''
 
@@ -700,6 +1138,10 @@ class _FormattedReader:
         ''' read double '''
         return self.fio.readdouble()
 
+    def readbytes(self, n):
+        ''' read `n` bytes '''
+        return self.fio.readbytes(n)
+
     def readbytes_lengthprefixed(self):
         ''' read bytes, length prefixed '''
         n = self.readint32()
@@ -726,15 +1168,12 @@ class _FormattedReader:
         ''' returns a dictionary holding a single name : value pair '''
         name = self.readtext()
         kind = self.readint32()
-        if kind == _ValueKind.Int32:
-            value = self.readint32()
-        elif kind == _ValueKind.Double:
-            value = self.readdouble()
-        elif kind == _ValueKind.Text:
-            value = self.readtext()
-        elif kind == _ValueKind.Uuid:
-            value = self.readuuid()
-        return {name: value}
+        readvalue = self._valuereaders.get(kind)
+        if readvalue is None:
+            raise ValueError("Invalid kind of NameValue: {}".format(kind))
+        return {name: readvalue(self)}
+
+    _valuereaders = {_ValueKind.Int32: readint32, _ValueKind.Double: readdouble, _ValueKind.Text: readtext, _ValueKind.Uuid: readuuid}
 
 
 class _FormattedWriter:
@@ -768,10 +1207,8 @@ class _FormattedWriter:
         self.writebytes_lengthprefixed(text.encode("utf8"))   # todo: is this encoding right?
 
     def writeuuid(self, uuidvalue):
-        ''' Not implemented yet. writes `uuidvalue` into the file. '''
-        raise Exception("cannot write uuid, feature not yet implemented. uuid={}{}".format(self, uuidvalue))
-        #bytes16 = self.fio.writebytes(16)
-        #return uuid.UUID(bytes=bytes16)
+        ''' writes `uuidvalue` into the file, as the 16 bytes readuuid reads '''
+        self.fio.writebytes(uuidvalue.bytes)
 
     def skipbytes(self, bytestoskip):
         ''' skip `bytestoskip` '''
@@ -783,17 +1220,7 @@ class _FormattedWriter:
 
     def writenamevalue(self, key, value):
         ''' write a name/value pair '''
-        kind = _getnamevaluekind(value)
-        self.writetext(key)
-        self.writeint32(kind)
-        if kind == _ValueKind.Int32:
-            self.writeint32(value)
-        elif kind == _ValueKind.Double:
-            self.writedouble(value)
-        elif kind == _ValueKind.Text:
-            self.writetext(value)
-        elif kind == _ValueKind.Uuid:
-            self.writeuuid(value)
+        self.writeraw(_packnamevalue(key, value))
 
 
 # descriptions
@@ -841,14 +1268,16 @@ class ItemDescription:
         self.itemstruct = None  # the struct for marshalling to the file
         self.itemtype = None    # the named tuple class used for items
         self.fieldnames = None
+        self._numpydtype = None
+        self._fieldsbyoffset = None     # maps offsets to fields, set up once offsets are known
+        self._maxfieldsize = 1          # the size of the largest field, set up while fields are appended
 
     def __repr__(self):
-        from pprint import pformat
         return "Name:\t{}\nSize:\t{}\nFields:\n{}" \
             .format(self.itemname, self.itemsize, pformat(self.fields))
 
     @staticmethod
-    def create(itemname, fieldnames, fieldformat):
+    def create(itemname, fieldnames, fieldformat, packforsize=False):
         '''
         Creates an ItemDescription instance to be used for the creation of a new TeaFile.
 
@@ -866,33 +1295,75 @@ class ItemDescription:
             2. padding bytes (format character 'x') are not available.
             3. Only these formats are allowed:
             "b", "h", "i", "q", "B", "H", "I", "Q", "f", "d".
+
+        If packforsize is true, the fields are reordered by descending size, keeping the order of fields of
+        equal size. So no padding is needed between fields, only at the end of the item. The fields, their
+        names and the named tuple class follow the new order, which is also the order stored in the file.
+
+        >>> ItemDescription.create(None, "A B C D", "bqbq").itemsize
+        32
+        >>> id_ = ItemDescription.create(None, "A B C D", "bqbq", True)
+        >>> id_.itemsize, id_.fieldnames
+        (24, ['B', 'D', 'A', 'C'])
+
+        The layout is analyzed once for the same arguments and cached. Each call returns a copy of the cached
+        description having its own fields, so it can be modified, while files created with the same layout
+        share the struct and the named tuple class.
         '''
+        if isinstance(fieldnames, list):
+            fieldnames = tuple(fieldnames)   # hashable, for the cache
+        return ItemDescription._create(itemname, fieldnames, fieldformat, packforsize)._copy()  # pylint: disable-msg=W0212
 
+    def _copy(self):
+        ''' returns a copy having its own fields, that shares the struct and the named tuple class '''
+        id_ = ItemDescription()
+        id_.__dict__.update(self.__dict__)
+        id_.fields = []
+        for f in self.fields:
+            fcopy = Field()
+            fcopy.__dict__.update(f.__dict__)
+            id_.fields.append(fcopy)
+        id_.fieldnames = list(self.fieldnames)
+        id_._fieldsbyoffset = dict((f.offset, f) for f in id_.fields)
+        return id_
+
+    @staticmethod
+    @_memoize(64)
+    def _create(itemname, fieldnames, fieldformat, packforsize):
+        ''' creates the instance returned by create, `fieldnames` is a tuple or a string '''
         id_ = ItemDescription()
 
         # prepare arguments
-        if not isinstance(fieldnames, list):
+        if isinstance(fieldnames, tuple):
+            fieldnames = list(fieldnames)
+        else:
             fieldnames = fieldnames.split()
-        id_.fieldnames = fieldnames
         if not itemname:
             itemname = "".join([s[0] for s in fieldnames])
 
         if not fieldformat:
             fieldformat = "q" * len(fieldnames)
 
-        id_.itemtype = namedtuple(itemname, fieldnames)
-        id_.itemstruct = struct.Struct(fieldformat)
-        id_.itemname = itemname
-
         # ensure fieldformat has no repeat numbers
         if not set(fieldformat).isdisjoint("0123456789"):
             raise ValueError("fieldformat contains digits. change format such that no digits occur")
-        # remove byte order specifiers used by the struct module
+        # remove byte order specifiers used by the struct module, the offsets are analyzed for the one given first
+        byteorder = fieldformat[:1] if fieldformat[:1] in "@<>=!" else ""
         fieldformat = "".join([c for c in fieldformat if not c in "@<>=!"])
         if len(fieldformat) != len(fieldnames):
             raise Exception("fieldformat has different number of characters than fieldnames: " + \
                 fieldformat + "(" + str(len(fieldformat)) + ") vs " + \
                 ",".join(fieldnames) + "(" + str(len(fieldnames)) + ")")
+        if packforsize:
+            order = sorted(range(len(fieldnames)), key=lambda i: -FieldType.getsize(FieldType.getfromformatcharacter(fieldformat[i])))
+            fieldnames = [fieldnames[i] for i in order]
+            fieldformat = "".join([fieldformat[i] for i in order])
+
+        id_.fieldnames = fieldnames
+        id_.itemtype = _getitemtype(itemname, tuple(fieldnames))
+        id_.itemstruct = _getstruct(byteorder + fieldformat)
+        id_.itemname = itemname
+
         # create Fields
         i = 0
         for fname in fieldnames:
@@ -901,33 +1372,58 @@ class ItemDescription:
             f.index = i
             f.formatchar = fieldformat[i]
             f.fieldtype = FieldType.getfromformatcharacter(f.formatchar)
+            f.size = FieldType.getsize(f.fieldtype)
+            if f.size > id_._maxfieldsize:     # pylint: disable-msg=W0212
+                id_._maxfieldsize = f.size     # pylint: disable-msg=W0212
             i += 1
             id_.fields.append(f)
+        # fields named "time" are the time fields, as stored in the time section. the first is the event time
+        timefields = [f for f in id_.fields if f.name.lower() == "time"]
+        for f in timefields:
+            f.istime = True
+        if timefields:
+            timefields[0].iseventtime = True
 
         # analyze and assign offsets
-        _analyzefieldoffsets(id_)
-        id_._adjustitemstructforpadding(fieldformat)    # pylint: disable-msg=W0212
+        _analyzefieldoffsets(id_, byteorder)
+        id_._fieldsbyoffset = dict((f.offset, f) for f in id_.fields)  # pylint: disable-msg=W0212
+        id_._adjustitemstructforpadding(byteorder + fieldformat)    # pylint: disable-msg=W0212
         return id_
 
     def _adjustitemstructforpadding(self, fieldformat):
         ''' we add trailing padding bytes after layout analysis, because it does not matter there '''
-        itemalignment = max(FieldType.getsize(f.fieldtype) for f in self.fields)
         rawsize = self.itemstruct.size
-        itempadding = itemalignment - (rawsize % itemalignment)
-        if itempadding == itemalignment:
-            itempadding = 0
+        itempadding = -rawsize & (self._maxfieldsize - 1)     # items align to their largest field, a power of 2
         self.itemsize = rawsize + itempadding
         if itempadding:
             fieldformat += str(itempadding) + "x"
-            self.itemstruct = struct.Struct(fieldformat)
+            self.itemstruct = _getstruct(fieldformat)
+
+    @property
+    def numpydtype(self):
+        '''
+        The structured numpy dtype matching the item layout: one little endian field per item field, placed at
+        the field's offset, with itemsize as size. The dtype is created on first access. Requires numpy.
+
+        >>> ItemDescription.create(None, "Time Price Volume", "qdq").numpydtype
+        dtype([('Time', '<i8'), ('Price', '<f8'), ('Volume', '<i8')])
+        '''
+        if self._numpydtype is None:
+            if numpy is None:
+                raise ImportError("numpydtype requires numpy")
+            self._numpydtype = numpy.dtype({
+                'names': self.fieldnames,
+                'formats': [FieldType.getnumpyformat(f.fieldtype) for f in self.fields],
+                'offsets': [f.offset for f in self.fields],
+                'itemsize': self.itemsize})
+        return self._numpydtype
 
     def getfieldbyoffset(self, offset):
         ''' Returns a field given its offset '''
-        for f in self.fields:
-            if f.offset == offset:
-                return f
-        print("field not found at offset{0}".format(offset))
-        raise RuntimeError()
+        try:
+            return self._fieldsbyoffset[offset]
+        except KeyError:
+            raise RuntimeError("field not found at offset {0}".format(offset))
 
     def setupfromfields(self):
         ''' When a TeaFile is read from file, the fields are created and appended to this instance.
@@ -935,34 +1431,53 @@ class ItemDescription:
         self.fieldnames = [self._getsafename(f.name) for f in self.fields]
         for f in self.fields:
             f.size = FieldType.getsize(f.fieldtype)
-        self.itemtype = namedtuple(self._getsafename(self.itemname), self.fieldnames)
+            if f.size > self._maxfieldsize:
+                self._maxfieldsize = f.size
+        self._fieldsbyoffset = dict((f.offset, f) for f in self.fields)
+        self.itemtype = _getitemtype(self._getsafename(self.itemname), tuple(self.fieldnames))
         fieldformat = "".join([FieldType.getformatcharacter(f.fieldtype) for f in self.fields])
-        self.itemstruct = struct.Struct(fieldformat)
+        self.itemstruct = _getstruct(fieldformat)
         self._adjustitemstructforpadding(fieldformat)
 
     @staticmethod
     def _getsafename(name):
         ''' convert item or field name to a name valid for namedtuple '''
-        validchars = '_abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
-        return ''.join(c for c in name if c in validchars)
-
-
-def _analyzefieldoffsets(itemdescription):
-    ''' analyzes the itemdescription to find how it will be layouted '''
-    id_ = itemdescription
-    import array
-    buffer_ = array.array('b', [0] * id_.itemstruct.size)
-    for f in id_.fields:
-        fts = FieldType.getsize(f.fieldtype)
-        for pos in range(0, id_.itemstruct.size - fts + 1):
-            magic = FieldType.getmagicvalue(f.fieldtype)
-            struct.pack_into(f.formatchar, buffer_, pos, magic)
-            testitem = id_.itemstruct.unpack(buffer_)
-            struct.pack_into(f.formatchar, buffer_, pos, 0)  # reset buffer
-            if testitem[f.index] == magic:
-                f.offset = pos
-                break
-    return None
+        return _UNSAFECHARS.sub('', name)
+
+
+_UNSAFECHARS = re.compile('[^_a-zA-Z0-9]')     # characters not valid in namedtuple names, removed by _getsafename
+
+
+@_memoize(256)
+def _getitemtype(itemname, fieldnames):
+    ''' returns the named tuple class for items, shared by all files having the same item and field names '''
+    return namedtuple(itemname, fieldnames)
+
+
+@_memoize(256)
+def _getstruct(fieldformat):
+    ''' returns the compiled struct for `fieldformat`, shared by all files having the same item layout '''
+    return struct.Struct(fieldformat)
+
+
+def _makebatchstruct(fieldformat, count):
+    ''' returns a struct that unpacks `count` items of layout `fieldformat` at once '''
+    byteorder = fieldformat[:1] if fieldformat[:1] in "@<>=!" else ""
+    return struct.Struct(byteorder + fieldformat[len(byteorder):] * count)
+
+_getbatchstruct = _memoize(16)(_makebatchstruct)    # full batches share their struct
+
+
+def _analyzefieldoffsets(itemdescription, byteorder=""):
+    '''
+    assigns the offset of each field inside the item. a field ends where struct.calcsize places the end of the
+    fields up to and including it, so offsets follow the alignment rules the struct module applies for
+    `byteorder` on the platform at hand.
+    '''
+    fieldformat = byteorder
+    for f in itemdescription.fields:
+        fieldformat += f.formatchar
+        f.offset = struct.calcsize(fieldformat) - struct.calcsize(byteorder + f.formatchar)
 
 
 class FieldType:
@@ -973,36 +1488,44 @@ class FieldType:
     _typeNames = [None, "Int8", "Int16", "Int32", "Int64", "UInt8", "UInt16", "UInt32", "UInt64", "Float", "Double"]
     _typesizes = [1, 2, 4, 8, 1, 2, 4, 8, 4, 8]
     _formatCharacters = ["b", "h", "i", "q", "B", "H", "I", "Q", "f", "d"]
-    _magicValues = [0, 0x71, 0x7172, 0x71727374, 0x7172737475767778, 0xa1, 0xa1a2, 0xa1a2a3a4, 0xa1a2a3a4a5a6a7a8, 1.01, 3.07]
+    _numpyFormats = ["<i1", "<i2", "<i4", "<i8", "<u1", "<u2", "<u4", "<u8", "<f4", "<f8"]
+    # lookups by field type and by format character
+    _sizes = dict(zip(_formatNumbers, _typesizes))
+    _formatcharacters = dict(zip(_formatNumbers, _formatCharacters))
+    _fieldtypes = dict(zip(_formatCharacters, _formatNumbers))
+    _numpyformats = dict(zip(_formatNumbers, _numpyFormats))
 
     @staticmethod
     def getsize(fieldtype):
         ''' get the size of a field type '''
-        i = FieldType._formatNumbers.index(fieldtype)
-        return FieldType._typesizes[i]
+        try:
+            return FieldType._sizes[fieldtype]
+        except KeyError:
+            raise ValueError("Invalid fieldtype: {}".format(fieldtype))
 
     @staticmethod
     def getfromformatcharacter(c):
         ''' get the field type given its formatting character as used by the `struct` module '''
         try:
-            i = FieldType._formatCharacters.index(c)
-            return FieldType._formatNumbers[i]
-        except:
+            return FieldType._fieldtypes[c]
+        except KeyError:
             raise ValueError("Invalid format character: " + c)
 
     @staticmethod
     def getformatcharacter(fieldtype):
         ''' get the formatting character of a field type, as used by the `struct` module '''
         try:
-            i = FieldType._formatNumbers.index(fieldtype)
-            return FieldType._formatCharacters[i]
-        except:
-            raise ValueError("Invalid fieldtype: " + fieldtype)
+            return FieldType._formatcharacters[fieldtype]
+        except KeyError:
+            raise ValueError("Invalid fieldtype: {}".format(fieldtype))
 
     @staticmethod
-    def getmagicvalue(fieldtype):
-        ''' given a fieldtype, get a magic value. This is used for analyzing the item layout. '''
-        return FieldType._magicValues[fieldtype]
+    def getnumpyformat(fieldtype):
+        ''' get the numpy type string of a field type, like '<f8' for Double '''
+        try:
+            return FieldType._numpyformats[fieldtype]
+        except KeyError:
+            raise ValueError("Invalid fieldtype: {}".format(fieldtype))
 
     @staticmethod
     def getname(fieldtype):
@@ -1090,13 +1613,15 @@ class _ItemSectionFormatter:
         id_.itemsize = r.readint32()
         id_.itemname = r.readtext()
         fieldcount = r.readint32()
+        readint32 = r.readint32     # bound once, the loop reads 3 values per field
+        readtext = r.readtext
         i = 0
         for _ in range(fieldcount):
             f = Field()
             f.index = i
-            f.fieldtype = r.readint32()
-            f.offset = r.readint32()
-            f.name = r.readtext()
+            f.fieldtype = readint32()
+            f.offset = readint32()
+            f.name = readtext()
             id_.fields.append(f)
             i += 1
         id_.setupfromfields()
@@ -1105,14 +1630,22 @@ class _ItemSectionFormatter:
     def write(self, wc):
         ''' writes the section '''
         id_ = wc.description.itemdescription
-        w = wc.writer
-        w.writeint32(id_.itemsize)
-        w.writetext(id_.itemname)
-        w.writeint32(len(id_.fields))
-        for f in id_.fields:
-            w.writeint32(f.fieldtype)
-            w.writeint32(f.offset)
-            w.writetext(f.name)
+        itemname = id_.itemname.encode("utf8")
+        names = [f.name.encode("utf8") for f in id_.fields]
+        # the section is packed into one buffer: the item head, the field count and a head plus name for each field
+        buf = bytearray(_ITEMSECTIONHEAD.size + len(itemname) + 4 + _FIELDHEAD.size * len(names) + sum(len(n) for n in names))
+        _ITEMSECTIONHEAD.pack_into(buf, 0, id_.itemsize, len(itemname))
+        pos = _ITEMSECTIONHEAD.size
+        buf[pos:pos + len(itemname)] = itemname
+        pos += len(itemname)
+        _INT32.pack_into(buf, pos, len(names))
+        pos += 4
+        for f, name in zip(id_.fields, names):
+            _FIELDHEAD.pack_into(buf, pos, f.fieldtype, f.offset, len(name))
+            pos += _FIELDHEAD.size
+            buf[pos:pos + len(name)] = name
+            pos += len(name)
+        wc.writer.writeraw(buf)
 
 
 class _ContentSectionFormatter:
@@ -1153,10 +1686,9 @@ class _NameValueSectionFormatter:
         nvs = wc.description.namevalues
         if not nvs:
             return
-        w = wc.writer
-        w.writeint32(len(nvs))
-        for key, value in nvs.items():
-            w.writenamevalue(key, value)
+        parts = [_INT32.pack(len(nvs))]
+        parts.extend(_packnamevalue(key, value) for key, value in nvs.items())
+        wc.writer.writeraw(b"".join(parts))     # the section is written at once
 
 
 class _TimeSectionFormatter:
@@ -1188,16 +1720,12 @@ class _TimeSectionFormatter:
 
     def write(self, wc):
         ''' writes the section '''
-        w = wc.writer
-        # this api restricts time formats to JavaTime
+        # this api restricts time formats to JavaTime: days between 0001-01-01 and 1970-01-01, millisecond resolution
         # in addition, the first field named "time" is considered the EventTime
-        w.writeint64(719162)        # days between 0001-01-01 and 1970-01-01
-        w.writeint64(86400 * 1000)  # millisecond resolution
         id_ = wc.description.itemdescription
         timefields = [f for f in id_.fields if f.name.lower() == "time"]
-        w.writeint32(len(timefields))   # will be 0 or 1
-        for f in timefields:
-            w.writeint32(f.offset)
+        section = _TIMESECTIONHEAD.pack(719162, 86400 * 1000, len(timefields))   # will be 0 or 1 time fields
+        wc.writer.writeraw(section + b"".join(_INT32.pack(f.offset) for f in timefields))
 
 
 class _HeaderManager:
@@ -1208,24 +1736,25 @@ class _HeaderManager:
             _ContentSectionFormatter(),
             _NameValueSectionFormatter(),
             _TimeSectionFormatter()])
+        self._formattersbyid = dict((f.id, f) for f in self.sectionformatters)
 
     def getformatter(self, id_):
         ''' the a formatter given its id '''
-        for f in self.sectionformatters:
-            if f.id == id_:
-                return f
-        raise RuntimeError()
+        try:
+            return self._formattersbyid[id_]
+        except KeyError:
+            raise RuntimeError("no formatter for section id {}".format(id_))
 
     def readheader(self, r):
         ''' read the file header '''
         rc = _ReadContext(r)
-        bom = r.readint64()
-        if bom != 0x0d0e0a0402080500:
-            print("Byteordermark mismatch: ", bom)
-            raise RuntimeError()
-        rc.itemareastart = r.readint64()
-        rc.itemareaend = r.readint64()
-        rc.sectioncount = r.readint64()
+        head = r.readbytes(_HEADERHEAD.size)
+        if not head.startswith(_BOM):
+            raise RuntimeError("Byteordermark mismatch: {!r}".format(head[:8]))
+        _, itemareastart, itemareaend, sectioncount = _HEADERHEAD.unpack(head)
+        rc.itemareastart = itemareastart
+        rc.itemareaend = itemareaend
+        rc.sectioncount = sectioncount
         n = rc.sectioncount
         while n > 0:
             self.readsection(rc)
@@ -1237,15 +1766,13 @@ class _HeaderManager:
     def readsection(self, rc):
         ''' read a section '''
         r = rc.reader
-        sectionid = r.readint32()
-        nextsectionoffset = r.readint32()
+        sectionid, nextsectionoffset = _SECTIONHEAD.unpack(r.readbytes(_SECTIONHEAD.size))
         beforesection = r.position()
         f = self.getformatter(sectionid)
         f.read(rc)
         aftersection = r.position()
         if (aftersection - beforesection) > nextsectionoffset:
-            print("section reads too many bytes")
-            raise RuntimeError()
+            raise RuntimeError("section {} reads too many bytes".format(sectionid))
 
     def writeheader(self, fw, description):
         ''' write the file header '''
@@ -1256,11 +1783,7 @@ class _HeaderManager:
         wc.sectioncount = 0
         sectionbytes = self.createsections(wc)
 
-        fw.writeint64(0x0d0e0a0402080500)
-        fw.writeint64(wc.itemareastart)
-        fw.writeint64(wc.itemareaend)
-        fw.writeint64(wc.sectioncount)
-        wc.writer.writeraw(sectionbytes)
+        fw.writeraw(_HEADERHEAD.pack(_BOMVALUE, wc.itemareastart, wc.itemareaend, wc.sectioncount) + sectionbytes)
 
         return wc
 
@@ -1276,24 +1799,22 @@ class _HeaderManager:
         saved = wc.writer
         sectionstream = BytesIO()
         sectionwriter = _FormattedWriter(_FileIO(sectionstream))
+        payloadstream = BytesIO()   # one stream and writer serve all sections, emptied before each
+        wc.writer = _FormattedWriter(_FileIO(payloadstream))
         pos = 32   # sections start at byte position 32
         for formatter in self.sectionformatters:
-            payloadstream = BytesIO()
-            wc.writer = _FormattedWriter(_FileIO(payloadstream))
+            payloadstream.seek(0)
+            payloadstream.truncate()
             formatter.write(wc)
             payload = payloadstream.getvalue()
             size = len(payload)
             if size > 0:
-                # section id
-                sectionwriter.writeint32(formatter.id)
-                pos += 4
-
-                # nextSectionOffset
-                sectionwriter.writeint32(size)
-                pos += 4
+                # section id and nextSectionOffset
+                sectionwriter.writeraw(_SECTIONHEAD.pack(formatter.id, size))
+                pos += _SECTIONHEAD.size
 
                 # payload
-                sectionwriter.writeraw(payloadstream.getvalue())
+                sectionwriter.writeraw(payload)
                 pos += size    # no padding or spacing done here
 
                 wc.sectioncount += 1
@@ -0,0 +1,83 @@
+# Copyright (C) 2011 discretelogics
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# cython: language_level=2
+
+'''
+    Compiled counterparts of the item reading loops of the teafile module.
+
+    This extension is optional: setup.py builds it if Cython is available and the teafile module falls back to its
+    pure python loops if it cannot be imported.
+'''
+
+
+cdef class ItemReader:
+    '''
+    Unpacks items from a buffer, like TeaFile.read does. `itemstruct` is the struct of the items,
+    `make` creates an item from its values, `timeindexes` lists the indexes of time fields and
+    `maketime` creates the time value of these fields from their ticks.
+    '''
+    cdef object unpack_from
+    cdef object make
+    cdef list timeindexes
+    cdef object maketime
+    cdef readonly Py_ssize_t itemsize
+
+    def __init__(self, itemstruct, make, timeindexes, maketime):
+        self.unpack_from = itemstruct.unpack_from
+        self.make = make
+        self.timeindexes = list(timeindexes)
+        self.maketime = maketime
+        self.itemsize = itemstruct.size
+
+    cpdef object readat(self, object buf, Py_ssize_t offset):
+        ''' returns the item stored at byte `offset` in `buf` '''
+        cdef object itemvalues = self.unpack_from(buf, offset)
+        cdef list values
+        cdef Py_ssize_t i
+        if self.timeindexes:
+            values = list(itemvalues)
+            for i in self.timeindexes:
+                values[i] = self.maketime(values[i])
+            itemvalues = values
+        return self.make(itemvalues)
+
+    def items(self, object buf, Py_ssize_t begin, Py_ssize_t end):
+        ''' returns an iterator over the items stored in `buf` between the byte offsets `begin` and `end` '''
+        return _ItemIterator(self, buf, begin, end)
+
+
+cdef class _ItemIterator:
+    ''' iterator returned by ItemReader.items '''
+    cdef ItemReader reader
+    cdef object buf
+    cdef Py_ssize_t offset
+    cdef Py_ssize_t end
+
+    def __cinit__(self, ItemReader reader, object buf, Py_ssize_t begin, Py_ssize_t end):
+        self.reader = reader
+        self.buf = buf
+        self.offset = begin
+        self.end = end
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        cdef Py_ssize_t offset = self.offset
+        if offset + self.reader.itemsize > self.end:
+            raise StopIteration
+        self.offset = offset + self.reader.itemsize
+        return self.reader.readat(self.buf, offset)
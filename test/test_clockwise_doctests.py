@@ -0,0 +1,178 @@
+# Copyright (C) 2011 discretelogics
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+''' doctests of the DateTime and Duration operators. they are kept here rather than in clockwise.py, such that
+    the operators, which are called in tight loops, carry one line docstrings only. '''
+
+import doctest
+import sys
+
+from teafiles.clockwise import *
+
+__test__ = {
+    'DateTime.__eq__': '''
+    >>> DateTime() == DateTime()
+    True
+    >>> DateTime(2011, 1, 2, 3, 4, 5) == DateTime(2011, 1, 2, 3, 4, 5)
+    True
+    >>> DateTime(2011, 1, 2, 3, 4, 999) == DateTime(2011, 1, 2, 3, 4, 5)
+    False
+    ''',
+
+    'DateTime.__ne__': '''
+    >>> DateTime() != DateTime()
+    False
+    >>> DateTime(2011, 1, 2, 3, 4, 5) != DateTime(2011, 1, 2, 3, 4, 5)
+    False
+    >>> DateTime(2011, 1, 2, 3, 4, 999) != DateTime(2011, 1, 2, 3, 4, 5)
+    True
+    ''',
+
+    'DateTime.__lt__': '''
+    >>> DateTime(100) < DateTime(110)
+    True
+    >>> DateTime(100) < DateTime(101)
+    True
+    >>> DateTime(100) < DateTime(100)
+    False
+    >>> DateTime(100) < DateTime(99)
+    False
+    ''',
+
+    'DateTime.__le__': '''
+    >>> DateTime(100) <= DateTime(110)
+    True
+    >>> DateTime(100) <= DateTime(101)
+    True
+    >>> DateTime(100) <= DateTime(100)
+    True
+    >>> DateTime(100) <= DateTime(99)
+    False
+    ''',
+
+    'DateTime.__gt__': '''
+    >>> DateTime(100) > DateTime(110)
+    False
+    >>> DateTime(100) > DateTime(101)
+    False
+    >>> DateTime(100) > DateTime(100)
+    False
+    >>> DateTime(100) > DateTime(99)
+    True
+    ''',
+
+    'DateTime.__ge__': '''
+    >>> DateTime(100) >= DateTime(110)
+    False
+    >>> DateTime(100) >= DateTime(101)
+    False
+    >>> DateTime(100) >= DateTime(100)
+    True
+    >>> DateTime(100) >= DateTime(99)
+    True
+    ''',
+
+    'DateTime.__add__': '''
+    >>> DateTime() + Duration()
+    1970-01-01 00:00:00:000
+    >>> DateTime(ticks=10) + Duration()
+    1970-01-01 00:00:00:010
+    >>> DateTime(ticks=10) + Duration(ticks=3)
+    1970-01-01 00:00:00:013
+    >>> DateTime(ticks=10) + Duration(ticks=-17)
+    1969-12-31 23:59:59:993
+    >>> t = DateTime()
+    >>> t
+    1970-01-01 00:00:00:000
+    >>> t += Duration(ticks=77)
+    >>> t
+    1970-01-01 00:00:00:077
+    ''',
+
+    'Duration.__eq__': '''
+    >>> Duration() == Duration()
+    True
+    >>> Duration() == Duration(ticks=3)
+    False
+    >>> Duration(ticks=3) == Duration(ticks=3)
+    True
+    ''',
+
+    'Duration.__ne__': '''
+    >>> Duration() != Duration()
+    False
+    >>> Duration() != Duration(ticks=3)
+    True
+    >>> Duration(ticks=3) != Duration(ticks=3)
+    False
+    ''',
+
+    'Duration.__lt__': '''
+    >>> Duration() < Duration()
+    False
+    >>> Duration() < Duration(ticks=3)
+    True
+    >>> Duration(ticks=3) < Duration(ticks=3)
+    False
+    >>> Duration(ticks=400) < Duration(ticks=3)
+    False
+    ''',
+
+    'Duration.__le__': '''
+    >>> Duration() <= Duration()
+    True
+    >>> Duration() <= Duration(ticks=3)
+    True
+    >>> Duration(ticks=3) <= Duration(ticks=3)
+    True
+    >>> Duration(ticks=400) <= Duration(ticks=3)
+    False
+    ''',
+
+    'Duration.__gt__': '''
+    >>> Duration() > Duration()
+    False
+    >>> Duration() > Duration(ticks=3)
+    False
+    >>> Duration(ticks=3) > Duration(ticks=3)
+    False
+    >>> Duration(ticks=400) > Duration(ticks=3)
+    True
+    ''',
+
+    'Duration.__ge__': '''
+    >>> Duration() >= Duration()
+    True
+    >>> Duration() >= Duration(ticks=3)
+    False
+    >>> Duration(ticks=3) >= Duration(ticks=3)
+    True
+    >>> Duration(ticks=400) >= Duration(ticks=3)
+    True
+    ''',
+
+    'Duration.__add__': '''
+    >>> Duration(days=4) + Duration(hours=7)
+    4 days 07:00:00:000
+
+    >>> Duration(days=4) + 3000
+    4 days 00:00:03:000
+    '''
+}
+
+
+def test_doctests():
+    failures, _ = doctest.testmod(sys.modules[__name__])
+    assert failures == 0
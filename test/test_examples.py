@@ -36,6 +36,41 @@ def test_createticks():
         assert tf.itemcount == 10
 
 
+def test_createticks_bulk():
+    filename = gettempfilename()
+    examples.createticks_bulk(filename, 10)
+    with TeaFile.openread(filename) as tf:
+        assert tf.itemcount == 10
+        items = list(tf.items())
+        assert items[0].Time == DateTime(2000, 1, 1)
+        assert items[9].Time == DateTime(2000, 1, 1, 0, 9)
+        assert all(0 <= item.Price < 100 for item in items)
+
+
+def test_bulkwriter():
+    filename = gettempfilename()
+    with TeaFile.create(filename, "Time Price Volume", "qdq") as tf:
+        with examples._bulkwriter(tf, 50) as write:  # room for 2 items, flushes while writing
+            for i in range(5):
+                write(i * 1000, i * 1.5, i)
+    with TeaFile.openread(filename) as tf:
+        items = list(tf.items())
+        assert len(items) == 5
+        assert items[4].Time == DateTime(ticks=4000)
+        assert items[4].Price == 6.0
+        assert items[4].Volume == 4
+
+
+def test_bulkwriter_buffer_smaller_than_item():
+    filename = gettempfilename()
+    with TeaFile.create(filename, "Time Price Volume", "qdq") as tf:
+        with examples._bulkwriter(tf, 10) as write:  # rounded up to one item
+            for i in range(3):
+                write(i * 1000, i * 1.5, i)
+    with TeaFile.openread(filename) as tf:
+        assert [item.Volume for item in tf.items()] == [0, 1, 2]
+
+
 def test_analyzeticks():
     filename = gettempfilename()
     examples.createticks(filename, 10)
@@ -48,6 +83,12 @@ def test_sumprices():
     examples.sumprices(filename)
 
 
+def test_sumprices_fast():
+    filename = gettempfilename()
+    examples.createticks(filename, 10)
+    assert abs(examples.sumprices_fast(filename) - examples.sumprices(filename)) < 1e-9
+
+
 def test_printsnapshot():
     filename = gettempfilename()
     examples.createticks(filename, 10)
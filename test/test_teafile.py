@@ -18,7 +18,10 @@
 import tempfile
 import os
 import sys
+import warnings
+import pytest
 from teafiles import *
+from teafiles.teafile import TimeScale
 
 def setup_module(m):
     module = m
@@ -94,6 +97,12 @@ def test_itemcount():
             assert tf.itemcount == i
     with TeaFile.openread(filename) as tf:
         assert tf.itemcount == 10
+    assert tf.itemcount == 10   # accessible after close
+    with TeaFile.openwrite(filename) as tf:
+        tf.write(11, 22, 33)
+        tf.flush()
+        assert tf.itemcount == 11
+        assert isinstance(tf.itemcount, int)
 
 
 def test_seekitem():
@@ -180,6 +189,20 @@ def test_namevalues():
         assert len(nvs) == 2
 
 
+def test_namevalue_kinds():
+    import uuid
+    filename = gettempfilename()
+    id_ = uuid.uuid4()
+    namevalues = {"i": 7, "d": 2.5, "s": "text", "u": u"unicode", "id": id_, "b": True}
+    with TeaFile.create(filename, "A", "q", None, namevalues) as tf:
+        pass
+    with TeaFile.openread(filename) as tf:
+        nvs = tf.description.namevalues
+        assert nvs == {"i": 7, "d": 2.5, "s": "text", "u": u"unicode", "id": id_, "b": 1}
+    with pytest.raises(ValueError):
+        TeaFile.create(filename, "A", "q", None, {"x": [1]})
+
+
 def test_decimals():
     filename = gettempfilename()
     with TeaFile.create(filename, "A B C", "qqq", "mycontent", {"decimals": 3, "bb": 22}) as tf:
@@ -199,6 +222,378 @@ def test_items_iteration():
         assert len([item for item in tf.items()]) == 2
 
 
+def test_items_across_chunks():
+    filename = gettempfilename()
+    with TeaFile.create(filename, "Time Value", "qq") as tf:
+        for i in range(10000):     # 160000 bytes, more than one chunk
+            tf.write(DateTime(ticks=i), i)
+    with TeaFile.openread(filename) as tf:
+        items = list(tf.items())
+        assert len(items) == 10000
+        assert items[-1] == (DateTime(ticks=9999), 9999)
+        assert isinstance(items[0].Time, DateTime)
+        assert [item.Value for item in tf.items(4095, 4098)] == [4095, 4096, 4097]
+        assert list(tf.items(9998, 20000)) == items[9998:]
+
+
+def test_items_batches():
+    filename = gettempfilename()
+    with TeaFile.create(filename, "A B C", "qbh") as tf:     # 5 padding bytes per item
+        for i in range(5000):
+            tf.write(i, i % 100, -i % 1000)
+    expected = [(i, i % 100, -i % 1000) for i in range(5000)]
+    with TeaFile.openread(filename) as tf:
+        assert [tuple(item) for item in tf.items()] == expected
+        tf.seekitem(7)
+        item = tf.read()
+        assert type(item) is tf.nameditemtuple and item.C == -7 % 1000 and item._asdict()["A"] == 7
+        assert list(tf.items(raw=True)) == expected
+        assert list(tf.items(4090, 4100, raw=True)) == expected[4090:4100]
+    with TeaFile.openwrite(filename) as tf:    # not mapped, read in chunks
+        assert list(tf.items(1, 4999, raw=True)) == expected[1:4999]
+
+
+def test_readarray():
+    numpy = pytest.importorskip("numpy")
+    filename = gettempfilename()
+    with TeaFile.create(filename, "Time Price Volume", "qdq") as tf:
+        for i in range(100):
+            tf.write(DateTime(ticks=i * 1000), i * 0.5, i)
+    with TeaFile.openread(filename) as tf:
+        a = tf.readarray()
+        assert len(a) == 100
+        assert a['Time'][7] == numpy.datetime64(7000, 'ms')     # time fields of the Java scale are datetime64
+        assert a['Price'][7] == 3.5
+        assert a.view(tf.description.itemdescription.numpydtype).tolist()[99] == (99000, 49.5, 99)
+        assert len(tf.readarray(90, 200)) == 10
+        assert len(tf.readarray(100)) == 0
+        assert len(tf.readarray(150)) == 0     # start beyond the last item
+        assert len(tf.readarray(150, copy=False)) == 0
+        a[0]['Volume'] = 7       # arrays returned are writable
+        v = tf.readarray(10, 20, copy=False)
+        assert not v.flags.writeable     # a view into the mapped file
+        assert v.tolist() == a[10:20].tolist()
+        assert tf.read().Volume == 20    # the filepointer moved past the items viewed
+    assert v['Price'].sum() == sum(i * 0.5 for i in range(10, 20))     # views remain valid after closing
+    with TeaFile.openwrite(filename) as tf:
+        assert tf.readarray(copy=False).flags.writeable  # not mapped, copy does not apply
+
+
+def test_mappedread():
+    filename = gettempfilename()
+    with TeaFile.create(filename, "A B", "qd") as tf:
+        for i in range(10):
+            tf.write(i, i * 2.0)
+    with TeaFile.openread(filename) as tf:
+        assert tf._mm is not None
+        assert [item.A for item in tf.items(2, 4)] == [2, 3]
+        assert tf.read().A == 4       # items moved the position past the last item returned
+        tf.seekitem(9)
+        assert tf.read() == (9, 18.0)
+        assert tf.read() is None
+        tf.seekend()
+        assert tf.read() is None
+    assert tf._mm is None
+    with TeaFile.openwrite(filename) as tf:
+        assert tf._mm is None         # files opened for writing are not mapped
+
+
+def test_read_openwrite():
+    filename = gettempfilename()
+    with TeaFile.create(filename, "A B", "qd") as tf:
+        for i in range(3):
+            tf.write(i, i * 2.0)
+    with TeaFile.openwrite(filename) as tf:
+        tf.seekitem(1)
+        first = tf.read()
+        assert first == (1, 2.0)
+        assert tf.read() == (2, 4.0)   # the read buffer is reused, items returned before are unaffected
+        assert first == (1, 2.0)
+        assert tf.read() is None
+
+
+def test_write_named_arguments():
+    filename = gettempfilename()
+    with TeaFile.create(filename, "Time Price", "qd") as tf:
+        tf.write(Price=1.5, Time=DateTime(ticks=1000))
+        tf.write(2000, 2.5)
+        with pytest.raises(TypeError):
+            tf.write(3000)
+    with TeaFile.openread(filename) as tf:
+        assert [tuple(item) for item in tf.items()] == [(DateTime(ticks=1000), 1.5), (DateTime(ticks=2000), 2.5)]
+
+
+def test_write_timefields_decorated():
+    filename = gettempfilename()
+    with TeaFile.create(filename, "Time Price", "qd") as tf:
+        assert [f.istime for f in tf.description.itemdescription.fields] == [True, False]
+        assert tf._timeindexes == [0]
+        tf.write(DateTime(ticks=1000), 1.5)
+        tf._write(DateTime(ticks=2000), 2.5)
+        tf.writemany([(DateTime(ticks=3000), 3.5)])
+    with TeaFile.openread(filename) as tf:
+        assert [item.Time.ticks for item in tf.items()] == [1000, 2000, 3000]
+
+
+def test_write_datetime_without_timefields():
+    filename = gettempfilename()
+    t = DateTime(2000, 1, 1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")    # DateTime values must be unwrapped, not converted by struct
+        with TeaFile.create(filename, "A B", "qd") as tf:
+            tf.write(t, 1.0)
+            tf._write(t, 2.0)
+            tf.writemany([(t, 3.0)])
+    with TeaFile.openread(filename) as tf:
+        assert [tuple(item) for item in tf.items()] == [(t.ticks, 1.0), (t.ticks, 2.0), (t.ticks, 3.0)]
+
+
+def test_writemany():
+    filename = gettempfilename()
+    with TeaFile.create(filename, "Time Price", "qd") as tf:
+        tf.writemany([(DateTime(ticks=1000), 1.5), (2000, 2.5)])
+        tf.writemany((i * 1000, 0.5) for i in range(3, 5))
+        tf.writemany([])
+    with TeaFile.openread(filename) as tf:
+        assert [item.Time.ticks for item in tf.items()] == [1000, 2000, 3000, 4000]
+        assert tf.read() is None
+
+
+def test_writemany_array():
+    pytest.importorskip("numpy")
+    filename = gettempfilename()
+    with TeaFile.create(filename, "Time Price", "qd") as tf:
+        tf.writemany([(1000, 1.5), (2000, 2.5)])
+    with TeaFile.openread(filename) as tf:
+        a = tf.readarray()
+    with TeaFile.openwrite(filename) as tf:
+        tf.writemany(a[::-1])
+        with pytest.raises(ValueError):
+            tf.writemany(a[['Time']])
+    with TeaFile.openread(filename) as tf:
+        assert [item.Price for item in tf.items()] == [1.5, 2.5, 2.5, 1.5]
+
+
+def test_itemreader():
+    pytest.importorskip("teafiles.teafile_fast")
+    filename = gettempfilename()
+    with TeaFile.create(filename, "Time Price", "qd") as tf:
+        tf.writemany([(i * 1000, i * 0.5) for i in range(20)])
+    with TeaFile.openread(filename) as tf:
+        assert tf._itemreader is not None
+        compiled = list(tf.items()) + [tf.read()]
+        tf.seekitem(3)
+        compiled.append(tf.read())
+        tf._itemreader = None      # the pure python loops
+        python = list(tf.items()) + [tf.read()]
+        tf.seekitem(3)
+        python.append(tf.read())
+    assert compiled == python
+    assert compiled[-1] == (DateTime(ticks=3000), 1.5)
+    assert isinstance(compiled[0].Time, DateTime)
+
+
+def test_raw():
+    filename = gettempfilename()
+    with TeaFile.create(filename, "Time Price", "qd") as tf:
+        tf.writemany([(i * 1000, i * 0.5) for i in range(5)])
+    with TeaFile.openread(filename) as tf:
+        assert list(tf.items(3, raw=True)) == [(3000, 1.5), (4000, 2.0)]
+        tf.seekitem(1)
+        item = tf.read(raw=True)
+        assert type(item) is tuple
+        assert item == (1000, 0.5)
+    with TeaFile.openwrite(filename) as tf:
+        assert list(tf.items(0, 2, raw=True)) == [(0, 0.0), (1000, 0.5)]
+        tf.seekitem(4)
+        assert tf.read(raw=True) == (4000, 2.0)
+        assert tf.read(raw=True) is None
+
+
+def test_column():
+    pytest.importorskip("numpy")
+    filename = gettempfilename()
+    with TeaFile.create(filename, "Time Price Volume", "qdq") as tf:
+        tf.writemany([(i * 1000, i * 0.5, i) for i in range(10)])
+    with TeaFile.openread(filename) as tf:
+        prices = tf.column("Price")
+        assert tf.column("Time", 8).view("<i8").tolist() == [8000, 9000]
+        assert len(tf.column("Volume", 10)) == 0
+        assert len(tf.column("Volume", 20, 30)) == 0
+    assert prices.tolist() == [i * 0.5 for i in range(10)]    # still valid after close
+    assert not prices.flags.writeable
+    with TeaFile.openwrite(filename) as tf:
+        assert tf.column("Volume", 1, 3).tolist() == [1, 2]
+
+
+def test_close_mapping():
+    pytest.importorskip("numpy")
+    filename = gettempfilename()
+    with TeaFile.create(filename, "Time Price", "qd") as tf:
+        tf.writemany([(i * 1000, i * 0.5) for i in range(3)])
+    with TeaFile.openread(filename) as tf:
+        mm = tf._mm
+        a = tf.readarray()
+    with pytest.raises(ValueError):
+        len(mm)         # no view was returned, closing the file closed the mapping
+    assert a.tolist()[2][1] == 1.0
+    with TeaFile.openread(filename) as tf:
+        mm = tf._mm
+        a = tf.readarray(copy=False)
+    assert len(mm) > 0  # the view keeps the mapping open
+    assert a.tolist()[2][1] == 1.0
+
+
+def test_todatetime64():
+    numpy = pytest.importorskip("numpy")
+    ticks = numpy.array([0, 1500, 86400000], numpy.int64)
+    times = TimeScale.java().todatetime64(ticks)
+    assert times.dtype == numpy.dtype("<M8[ms]")
+    assert str(times[2]) == "1970-01-02T00:00:00.000"
+    assert times.base is ticks          # reinterpreted, not converted
+    seconds = TimeScale(719163, 86400).todatetime64([0])
+    assert str(seconds[0]) == "1970-01-02T00:00:00"
+    assert TimeScale(719162, 1000).datetime64format is None
+    with pytest.raises(ValueError):
+        TimeScale(719162, 7).todatetime64([0])
+
+
+def test_fileio_skipbytes():
+    from io import BytesIO
+    from teafiles.teafile import _FileIO
+    fio = _FileIO(BytesIO(b"\0" * 100 + b"\x07\0\0\0"))
+    fio.skipbytes(100)
+    assert fio.position() == 100
+    assert fio.readint32() == 7
+
+
+def test_bufferedfileio():
+    import struct
+    from io import BytesIO
+    from teafiles.teafile import _BufferedFileIO
+    data = struct.pack("<iqd", 1, 2, 3.5) + b"abcdef" + b"\0" * 20 + struct.pack("<q", 99)
+    stream = BytesIO(data)
+    fio = _BufferedFileIO(stream)
+    fio.blocksize = 5       # refill while reading values
+    assert fio.readint32() == 1
+    assert fio.readint64() == 2
+    assert fio.readdouble() == 3.5
+    assert fio.readbytes(6) == b"abcdef"
+    fio.skipbytes(20)       # beyond the buffer
+    assert fio.position() == len(data) - 8
+    assert fio.readint64() == 99
+    with pytest.raises(EOFError):
+        fio.readint32()
+
+
+def test_itemdescription_cache():
+    from teafiles.teafile import ItemDescription
+    id_ = ItemDescription.create(None, "Time Price Volume", "qdq")
+    other = ItemDescription.create(None, "Time Price Volume", "qdq")
+    assert other is not id_     # each call returns a copy of the cached description
+    assert other.itemstruct is id_.itemstruct and other.itemtype is id_.itemtype
+    assert ItemDescription.create(None, ["Time", "Price", "Volume"], "qdq").itemstruct is id_.itemstruct
+    assert ItemDescription.create(None, "Time Price Volume", "qqq").itemstruct is not id_.itemstruct
+    id_.fields[1].istime = True     # modifying a copy leaves the cached description untouched
+    id_.fieldnames.append("X")
+    other = ItemDescription.create(None, "Time Price Volume", "qdq")
+    assert not other.fields[1].istime and other.fieldnames == ["Time", "Price", "Volume"]
+    assert other.getfieldbyoffset(8) is other.fields[1]
+    filename = gettempfilename()
+    with TeaFile.create(filename, "Time Price Volume", "qdq"):
+        pass
+    with TeaFile.openread(filename) as tf1:
+        with TeaFile.openread(filename) as tf2:
+            assert tf1.nameditemtuple is tf2.nameditemtuple     # opening reuses the named tuple class
+            assert tf1.itemstruct is tf2.itemstruct
+
+
+def test_fieldoffsets():
+    import struct
+    from teafiles.teafile import ItemDescription
+    for prefix in ["", "<", "="]:
+        for formatchars in ["bq", "hbid", "BHIQ", "qbhf"]:
+            fieldformat = prefix + formatchars
+            id_ = ItemDescription.create(None, " ".join("F" + c for c in formatchars), fieldformat)
+            for f in id_.fields:
+                end = struct.calcsize(prefix + formatchars[:f.index + 1])     # the field ends here
+                assert f.offset == end - struct.calcsize(prefix + f.formatchar)
+
+
+def test_packforsize():
+    filename = gettempfilename()
+    with TeaFile.create(filename, "A Time B Price", "bqbd", packforsize=True) as tf:
+        assert tf.itemsize == 24
+        tf.write(A=1, B=2, Time=DateTime(ticks=3000), Price=4.5)
+    with TeaFile.openread(filename) as tf:
+        assert tf.description.itemdescription.fieldnames == ["Time", "Price", "A", "B"]
+        assert tf.itemsize == 24
+        assert tf.read() == (DateTime(ticks=3000), 4.5, 1, 2)
+
+
+def test_standardsize_padding():
+    from teafiles.teafile import ItemDescription
+    id_ = ItemDescription.create(None, "A B", "<bq")
+    assert [f.offset for f in id_.fields] == [0, 1]
+    assert id_.itemstruct.size == id_.itemsize == 16
+
+
+def test_fieldtype():
+    from teafiles.teafile import FieldType
+    assert FieldType.getsize(FieldType.Int16) == 2
+    assert FieldType.getfromformatcharacter("Q") == FieldType.UInt64
+    assert FieldType.getformatcharacter(FieldType.Float) == "f"
+    assert FieldType.getnumpyformat(FieldType.Double) == "<f8"
+    for invalid in (lambda: FieldType.getsize(11), lambda: FieldType.getfromformatcharacter("x"),
+                    lambda: FieldType.getformatcharacter(0), lambda: FieldType.getnumpyformat(11)):
+        with pytest.raises(ValueError):
+            invalid()
+
+
+def test_getsafename():
+    from teafiles.teafile import ItemDescription
+    assert ItemDescription._getsafename("Bid Price-1") == "BidPrice1"
+    assert ItemDescription._getsafename(u"Pr\xe9is_x") == u"Pris_x"
+    assert ItemDescription._getsafename("") == ""
+
+
+def test_byteordermark_mismatch():
+    filename = gettempfilename()
+    with open(filename, "wb") as f:
+        f.write(b"this is not a teafile, but long enough for a header" * 2)
+    with pytest.raises(RuntimeError):
+        TeaFile.openread(filename)
+
+
+def test_getformatter():
+    from teafiles.teafile import _HeaderManager
+    hm = _HeaderManager()
+    assert [hm.getformatter(f.id) for f in hm.sectionformatters] == hm.sectionformatters
+    with pytest.raises(RuntimeError):
+        hm.getformatter(0x99)
+
+
+def test_getfieldbyoffset():
+    from teafiles.teafile import ItemDescription
+    id_ = ItemDescription.create(None, "Time Price Volume", "qdq")
+    assert [id_.getfieldbyoffset(o).name for o in (0, 8, 16)] == ["Time", "Price", "Volume"]
+    with pytest.raises(RuntimeError):
+        id_.getfieldbyoffset(4)
+
+
+def test_topandas():
+    pytest.importorskip("pandas")
+    filename = gettempfilename()
+    with TeaFile.create(filename, "Time Price Volume", "qdq") as tf:
+        tf.writemany([(DateTime(2000, 1, 1 + i), i * 0.5, i) for i in range(5)])
+    with TeaFile.openread(filename) as tf:
+        df = tf.topandas(1, 3)
+    assert list(df.columns) == ["Time", "Price", "Volume"]
+    assert len(df) == 2
+    assert str(df["Time"][0]) == "2000-01-02 00:00:00"
+    assert df["Price"].tolist() == [0.5, 1.0]
+
+
 if __name__ == '__main__':
     pass
     # to be run with pytest. for debugging purposes, tests may be executed here.
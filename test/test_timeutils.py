@@ -16,6 +16,9 @@
 ''' pytest tests '''
 
 import datetime
+import pickle
+
+import pytest
 
 from teafiles.clockwise import *
 
@@ -28,11 +31,52 @@ def test_fromticks():
     assert dt.ticks == 500
 
 
+def test_foreign_types():
+    assert DateTime() != "1970-01-01"
+    assert not DateTime() == None
+    assert DateTime(ticks=7) == 7
+    with pytest.raises(TypeError):
+        DateTime() + 3
+
+
+def test_hash():
+    times = set([DateTime(2000, 1, 1), DateTime(2000, 1, 2)])
+    assert DateTime(2000, 1, 1) in times
+    assert DateTime(2000, 1, 3) not in times
+    assert DateTime.fromticks(946684800000) in times
+
+
+def test_fromticks_factory():
+    dt = DateTime.fromticks(86400000)
+    assert dt.ticks == 86400000
+    assert dt == DateTime(1970, 1, 2)
+
+
 def test_equality():
     assert DateTime(1970, 1, 3) == DateTime(1970, 1, 3)
     assert DateTime(2001, 4, 5) == DateTime(2001, 4, 5)
 
 
+def test_repr():
+    t = DateTime(2011, 4, 5, 22, 0, 14, 333)
+    assert repr(t) == "2011-04-05 22:00:14:333"
+    assert repr(t) == repr(DateTime(ticks=t.ticks))   # served from the cache
+    assert repr(DateTime(ticks=-1)) == "1969-12-31 23:59:59:999"
+
+
+def test_rangenticks():
+    pytest.importorskip("numpy")
+    ticks = rangenticks(DateTime(2000, 1, 1), Duration(minutes=1), 5)
+    assert list(ticks) == [t.ticks for t in rangen(DateTime(2000, 1, 1), Duration(minutes=1), 5)]
+
+
+def test_pickle():
+    for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+        assert pickle.loads(pickle.dumps(DateTime(2000, 1, 1), protocol)) == DateTime(2000, 1, 1)
+        assert pickle.loads(pickle.dumps(DateTime(), protocol)) == DateTime()
+        assert pickle.loads(pickle.dumps(Duration(hours=3), protocol)) == Duration(hours=3)
+
+
 def test_duration_ctor():
     d = Duration(hours=1)
     assert d.ticks == 60 * 60 * 1000